@@ -0,0 +1,63 @@
+"""
+Benchmark derived-statistic computation against the original per-row loop
+
+Usage:
+    python -m benchmarks.bench_derivations [--sizes 30 1000 ...] [--legacy-max 100000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from utils.data_processing import generate_sample_data
+from utils.derived_stats import PITCH_COLUMNS, PITCH_NAMES, derive_stats
+
+DEFAULT_SIZES = [30, 1_000, 10_000, 100_000, 1_000_000]
+
+def legacy_derive_stats(df):
+    """
+    Reference implementation: the iterrows loop process_pitcher_data used before
+    """
+    df['k_rate'] = (df['strikeouts'] / df['ab'] * 100).round(1)
+    df['total_bases'] = df['singles'] + 2 * df['doubles'] + 3 * df['triples'] + 4 * df['home_runs']
+    df['primary_pitch'] = None
+    for i, pitcher in df.iterrows():
+        try:
+            max_pitch_idx = np.argmax([pitcher[col] for col in PITCH_COLUMNS])
+            df.loc[i, 'primary_pitch'] = PITCH_NAMES[max_pitch_idx]
+        except:
+            df.loc[i, 'primary_pitch'] = 'Unknown'
+    return df
+
+def time_call(func, df, repeat):
+    """
+    Return the best wall time in seconds of func over fresh copies of df
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        frame = df.copy()
+        start = time.perf_counter()
+        func(frame)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--legacy-max', type=int, default=100_000,
+                        help='Largest row count to run the per-row loop on')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'vectorized (s)':>15} {'per-row loop (s)':>17} {'speedup':>9}")
+    for n in args.sizes:
+        df = generate_sample_data(n)
+        vectorized = time_call(derive_stats, df, args.repeat)
+        if n <= args.legacy_max:
+            legacy = time_call(legacy_derive_stats, df, 1)
+            print(f"{n:>10} {vectorized:>15.4f} {legacy:>17.4f} {legacy / vectorized:>8.0f}x")
+        else:
+            print(f"{n:>10} {vectorized:>15.4f} {'skipped':>17} {'-':>9}")
+
+if __name__ == '__main__':
+    main()
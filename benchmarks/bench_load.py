@@ -0,0 +1,94 @@
+"""
+Compare the pd.read_sql load path with the typed COPY load path
+
+Fills a scratch copy of ads_game_pitcher_stats_f with synthetic pitchers, then
+times and measures both ways of loading and processing it: pd.read_sql
+(psycopg2 builds a Decimal per DECIMAL value, every stat is coerced with
+pd.to_numeric, strings stay Python objects) and read_pitcher_table (COPY parsed
+straight into float32, small integers and categoricals).
+
+Usage:
+    python -m benchmarks.bench_load --database-url postgresql://... [--rows 100000]
+"""
+import argparse
+import io
+import time
+
+import pandas as pd
+from sqlalchemy import text
+
+from benchmarks.synthetic import generate_pitchers
+from utils.data_processing import memory_report, process_pitcher_data, read_pitcher_table
+from utils.db import get_engine
+from utils.derived_stats import derive_stats
+
+SCRATCH_TABLE = 'bench_pitcher_stats'
+
+def legacy_load(engine, table):
+    """
+    The previous load path: read_sql, then pd.to_numeric per column and derived stats
+    """
+    df = pd.read_sql(f"SELECT * FROM {table}", engine)
+    processed = df.copy()
+    for col in processed.columns:
+        if col not in ('name', 'team'):
+            processed[col] = pd.to_numeric(processed[col], errors='coerce')
+    derive_stats(processed)
+    return processed
+
+def typed_load(engine, table):
+    return process_pitcher_data(read_pitcher_table(engine, table))
+
+def create_scratch_table(engine, rows):
+    """
+    Create SCRATCH_TABLE like ads_game_pitcher_stats_f and COPY synthetic rows into it
+    """
+    df = generate_pitchers(rows)
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}"))
+        conn.execute(text(f"CREATE TABLE {SCRATCH_TABLE} (LIKE ads_game_pitcher_stats_f)"))
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.copy_expert(f"COPY {SCRATCH_TABLE} ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        conn.commit()
+    finally:
+        conn.close()
+
+def best_of(func, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the legacy and typed pitcher load paths')
+    parser.add_argument('--database-url', required=True)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch table afterwards')
+    args = parser.parse_args()
+
+    engine = get_engine(args.database_url)
+    create_scratch_table(engine, args.rows)
+    try:
+        legacy_seconds, legacy = best_of(lambda: legacy_load(engine, SCRATCH_TABLE), args.repeat)
+        typed_seconds, typed = best_of(lambda: typed_load(engine, SCRATCH_TABLE), args.repeat)
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}"))
+
+    pd.set_option('display.width', 120)
+    print(memory_report(legacy, typed).to_string(float_format=lambda v: f'{v:.2f}'))
+    print(f"\n{args.rows} rows: read_sql path {legacy_seconds:.2f}s, typed COPY path {typed_seconds:.2f}s "
+          f"({legacy_seconds / typed_seconds:.1f}x)")
+
+if __name__ == '__main__':
+    main()
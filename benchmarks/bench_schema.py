@@ -0,0 +1,198 @@
+"""
+Compare pitch-level query plans and timings with and without the schema migrations
+
+Seeds a scratch schema from db/ddl.sql plus db/migrations with a synthetic
+multi-season Statcast export, loaded through the bulk loader and folded by the
+rollup. The same rows are then copied into a second scratch schema as plain
+unpartitioned, unindexed tables, like the baseline schema before the
+migrations. Each query is timed against both and its plan printed.
+
+Usage:
+    python -m benchmarks.bench_schema --database-url postgresql://... [--pitches 500000] [--seasons 3]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+from benchmarks.synthetic import generate_pitches
+from utils.migrate import migrate
+from utils.rollup import run_incremental_rollup
+from utils.statcast_loader import load_statcast_csv
+
+SCHEMA = 'bench_schema'
+BASELINE_SCHEMA = 'bench_schema_baseline'
+DDL_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'db', 'ddl.sql')
+
+# Tables copied into the baseline schema; pitch_events loses the game_date column the migration added
+BASELINE_TABLES = {
+    'games': 'SELECT * FROM {schema}.games',
+    'etl_watermarks': 'SELECT * FROM {schema}.etl_watermarks',
+    'batted_ball_events': 'SELECT * FROM {schema}.batted_ball_events',
+    'pitcher_batter_outcomes': 'SELECT * FROM {schema}.pitcher_batter_outcomes',
+    'pitch_events': """
+        SELECT pitch_id, game_id, inning, half_inning, pitcher_id, batter_id, pitch_number,
+               pitch_type, pitch_velocity, pitch_spin_rate, pitch_horizontal_movement,
+               pitch_vertical_movement, pitch_location_x, pitch_location_y, balls_count,
+               strikes_count, outs_count, event_timestamp
+        FROM {schema}.pitch_events
+    """,
+}
+
+# name -> (query on the migrated schema, query on the baseline schema or None if the same)
+QUERIES = {
+    'pitcher_pitch_mix': ("""
+        SELECT pitch_type, COUNT(*), AVG(pitch_velocity)
+        FROM pitch_events WHERE pitcher_id = :pitcher_id
+        GROUP BY pitch_type
+    """, None),
+    'pitcher_game': ("""
+        SELECT COUNT(*), MAX(pitch_velocity)
+        FROM pitch_events WHERE pitcher_id = :pitcher_id AND game_id = :game_id
+    """, None),
+    'pitcher_batted_balls': ("""
+        SELECT COUNT(*), AVG(b.exit_velocity), COUNT(*) FILTER (WHERE b.hard_hit_flag)
+        FROM pitch_events p
+        JOIN batted_ball_events b ON b.pitch_id = p.pitch_id
+        WHERE p.pitcher_id = :pitcher_id
+    """, None),
+    'events_after_watermark': ("""
+        SELECT COUNT(*) FROM pitch_events WHERE event_timestamp >= :watermark
+    """, None),
+    'pitchers_in_date_range': ("""
+        SELECT DISTINCT pitcher_id FROM pitch_events
+        WHERE game_date BETWEEN :date_start AND :date_end
+    """, """
+        SELECT DISTINCT p.pitcher_id FROM pitch_events p
+        JOIN games g ON g.game_id = p.game_id
+        WHERE g.game_date BETWEEN :date_start AND :date_end
+    """),
+}
+
+def schema_engine(database_url, schema):
+    """
+    Engine whose connections resolve unqualified table names in the given schema
+    """
+    return create_engine(database_url, connect_args={'options': f'-c search_path={schema}'})
+
+def recreate_schema(engine, schema):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+
+def seed_schema(database_url, pitches, seasons):
+    """
+    Create the migrated schema and load synthetic pitches into it
+
+    Returns:
+        Engine bound to the seeded schema
+    """
+    engine = schema_engine(database_url, SCHEMA)
+    recreate_schema(engine, SCHEMA)
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cursor, open(DDL_FILE) as f:
+            cursor.execute(f.read())
+        conn.commit()
+    finally:
+        conn.close()
+    migrate(engine)
+
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    try:
+        generate_pitches(pitches, seasons=seasons).to_csv(path, index=False)
+        load_statcast_csv(engine, path, chunk_size=100_000, source_name='bench_schema')
+    finally:
+        os.unlink(path)
+    run_incremental_rollup(engine)
+    return engine
+
+def seed_baseline(database_url):
+    """
+    Copy the seeded rows into plain tables without partitions or secondary indexes
+
+    Returns:
+        Engine bound to the baseline schema
+    """
+    engine = schema_engine(database_url, BASELINE_SCHEMA)
+    recreate_schema(engine, BASELINE_SCHEMA)
+    with engine.begin() as conn:
+        for table, query in BASELINE_TABLES.items():
+            conn.execute(text(f"CREATE TABLE {table} AS {query.format(schema=SCHEMA)}"))
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level='AUTOCOMMIT').execute(text("ANALYZE"))
+    return engine
+
+def query_params(engine):
+    """
+    Parameters picking a busy pitcher, one of their games, a late watermark and a two-week window
+    """
+    with engine.connect() as conn:
+        pitcher_id, game_id = conn.execute(text("""
+            SELECT pitcher_id, MIN(game_id) FROM pitch_events
+            GROUP BY pitcher_id ORDER BY COUNT(*) DESC LIMIT 1
+        """)).one()
+        watermark = conn.execute(text(
+            "SELECT percentile_disc(0.95) WITHIN GROUP (ORDER BY event_timestamp) FROM pitch_events"
+        )).scalar()
+        last_date = conn.execute(text("SELECT MAX(game_date) FROM games")).scalar()
+    return {
+        'pitcher_id': pitcher_id,
+        'game_id': game_id,
+        'watermark': watermark,
+        'date_start': last_date.replace(day=1),
+        'date_end': last_date.replace(day=14),
+    }
+
+def time_query(engine, sql, params, repeat):
+    """
+    Best wall time of a query in milliseconds, and its plan
+    """
+    with engine.connect() as conn:
+        plan = [row[0] for row in conn.execute(text(f"EXPLAIN (COSTS OFF) {sql}"), params)]
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(text(sql), params).fetchall()
+            best = min(best, time.perf_counter() - start)
+    return best * 1000, plan
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare pitch-level queries on the migrated and baseline schemas')
+    parser.add_argument('--database-url', required=True)
+    parser.add_argument('--pitches', type=int, default=500_000)
+    parser.add_argument('--seasons', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch schemas afterwards')
+    args = parser.parse_args()
+
+    migrated = seed_schema(args.database_url, args.pitches, args.seasons)
+    baseline = seed_baseline(args.database_url)
+    try:
+        params = query_params(migrated)
+        print(f"\nQuery parameters: {params}")
+        results = []
+        for name, (sql, baseline_sql) in QUERIES.items():
+            migrated_ms, migrated_plan = time_query(migrated, sql, params, args.repeat)
+            baseline_ms, baseline_plan = time_query(baseline, baseline_sql or sql, params, args.repeat)
+            results.append((name, baseline_ms, migrated_ms))
+            print(f"\n== {name}")
+            print("-- baseline plan:")
+            print('\n'.join(f"   {line}" for line in baseline_plan))
+            print("-- migrated plan:")
+            print('\n'.join(f"   {line}" for line in migrated_plan))
+
+        print(f"\n{'query':<26}{'baseline ms':>14}{'migrated ms':>14}{'speedup':>10}")
+        for name, baseline_ms, migrated_ms in results:
+            print(f"{name:<26}{baseline_ms:>14.2f}{migrated_ms:>14.2f}{baseline_ms / migrated_ms:>9.1f}x")
+    finally:
+        if not args.keep:
+            for engine, schema in ((migrated, SCHEMA), (baseline, BASELINE_SCHEMA)):
+                with engine.begin() as conn:
+                    conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,385 @@
+"""
+Concurrent-user load test against a running dashboard server
+
+Replays the _dash-update-component requests a browser sends when users drag
+the pitch-count slider, change the team selection and page through the table.
+Callback payloads are built from the server's own /_dash-dependencies and
+/_dash-layout, so the tool follows the app without hard-coded request bodies.
+
+Background callbacks are followed the way the renderer does: each job is polled
+at the callback's interval until its result arrives, and an action that fires
+the callback again supersedes the user's running job with oldJob. Their
+latency runs from submission to result; superseded jobs are counted as
+cancelled, and jobs still running at the end are cancelled through the
+callback's cancel input.
+
+Start the server under its production config with synthetic data, e.g.:
+    DATA_SOURCE=synthetic SYNTHETIC_PITCHERS=100000 gunicorn --workers 4 --bind 127.0.0.1:8050 app:server
+
+then run:
+    python -m benchmarks.load_test --url http://127.0.0.1:8050 --users 20 --duration 60
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import numpy as np
+
+# Relative weight of each user action in the replayed mix
+ACTION_WEIGHTS = {'slider': 0.6, 'teams': 0.25, 'page': 0.15}
+
+def http_json(url, payload=None, timeout=30):
+    """
+    GET (or POST payload as JSON) and return (status, body bytes)
+    """
+    data = None
+    headers = {}
+    if payload is not None:
+        data = json.dumps(payload).encode()
+        headers['Content-Type'] = 'application/json'
+    request = urllib.request.Request(url, data=data, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+def wait_until_ready(base_url, timeout):
+    """
+    Poll /ready until the server reports the configured data source is loaded
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            status, body = http_json(base_url + '/ready', timeout=5)
+            if status == 200:
+                return json.loads(body)
+        except OSError:
+            pass
+        time.sleep(1)
+    raise TimeoutError(f'{base_url} did not become ready within {timeout}s')
+
+def layout_props(node, props=None):
+    """
+    Map component id -> props for every component with an id in a /_dash-layout tree
+    """
+    if props is None:
+        props = {}
+    if isinstance(node, list):
+        for child in node:
+            layout_props(child, props)
+    elif isinstance(node, dict):
+        node_props = node.get('props', {})
+        if 'id' in node_props:
+            props[node_props['id']] = node_props
+        for value in node_props.values():
+            if isinstance(value, (dict, list)):
+                layout_props(value, props)
+    return props
+
+def parse_outputs(output):
+    """
+    Split a dependency output string ('id.prop' or '..id.prop...id.prop..') into {id, property} dicts
+    """
+    multi = output.startswith('..')
+    parts = output.strip('.').split('...') if multi else [output]
+    outputs = []
+    for part in parts:
+        component_id, prop = part.rsplit('.', 1)
+        outputs.append({'id': component_id, 'property': prop})
+    return outputs if multi else outputs[0]
+
+class Callback:
+    """
+    One server-side callback from /_dash-dependencies
+    """
+    def __init__(self, dependency):
+        self.output = dependency['output']
+        self.outputs = parse_outputs(self.output)
+        self.inputs = dependency['inputs']
+        self.state = dependency.get('state', [])
+        first = self.outputs[0] if isinstance(self.outputs, list) else self.outputs
+        self.name = f"{first['id']}.{first['property']}"
+        # Background callbacks answer with a job to poll every interval milliseconds
+        self.background = dependency.get('long')
+
+    def triggered_by(self, component_id):
+        return any(dep['id'] == component_id for dep in self.inputs)
+
+    def payload(self, values, changed):
+        """
+        Request body for this callback given the client-side property values
+        """
+        def with_values(deps):
+            return [dict(dep, value=values.get((dep['id'], dep['property']))) for dep in deps]
+        return {
+            'output': self.output,
+            'outputs': self.outputs,
+            'inputs': with_values(self.inputs),
+            'state': with_values(self.state),
+            'changedPropIds': changed,
+        }
+
+class Stats:
+    """
+    Thread-safe latency, payload size and error samples per callback
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.cancelled = {}
+
+    def reset(self):
+        with self.lock:
+            self.samples = {}
+            self.cancelled = {}
+
+    def record(self, name, seconds, size, ok):
+        with self.lock:
+            self.samples.setdefault(name, []).append((seconds, size, ok))
+
+    def cancel(self, name):
+        with self.lock:
+            self.cancelled[name] = self.cancelled.get(name, 0) + 1
+
+    def report(self, elapsed):
+        rows = []
+        with self.lock:
+            names = sorted(set(self.samples) | set(self.cancelled))
+            samples_by_name = {name: list(self.samples.get(name, [])) for name in names}
+            cancelled = dict(self.cancelled)
+        for name in names:
+            samples = samples_by_name[name]
+            latencies = np.array([s[0] for s in samples]) * 1000
+            sizes = np.array([s[1] for s in samples])
+            errors = sum(1 for s in samples if not s[2])
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if samples else (float('nan'),) * 3
+            rows.append({
+                'callback': name,
+                'requests': len(samples),
+                'throughput_rps': len(samples) / elapsed,
+                'p50_ms': p50,
+                'p95_ms': p95,
+                'p99_ms': p99,
+                'mean_bytes': float(sizes.mean()) if samples else 0.0,
+                'error_rate': errors / len(samples) if samples else 0.0,
+                'cancelled': cancelled.get(name, 0),
+            })
+        return rows
+
+class VirtualUser(threading.Thread):
+    """
+    A simulated browser session issuing one action at a time until the stop event is set
+    """
+    def __init__(self, base_url, callbacks, props, stats, stop, think_time, seed):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.callbacks = callbacks
+        self.stats = stats
+        self.stop = stop
+        self.think_time = think_time
+        self.rng = random.Random(seed)
+
+        slider = props['pitches-slider']
+        self.slider_bounds = (slider['min'], slider['max'])
+        self.slider_step = slider.get('step') or 1
+        self.team_options = [option['value'] for option in props['team-dropdown'].get('options', [])]
+        # Every property a callback reads, seeded from the initial layout
+        self.values = {}
+        for callback in callbacks:
+            for dep in callback.inputs + callback.state:
+                key = (dep['id'], dep['property'])
+                self.values.setdefault(key, props.get(dep['id'], {}).get(dep['property']))
+        # Running background jobs by callback name
+        self.jobs = {}
+
+    def fire(self, component_id, prop):
+        """
+        Send every callback the changed property triggers, as the renderer does
+        """
+        for callback in self.callbacks:
+            if not callback.triggered_by(component_id):
+                continue
+            body = callback.payload(self.values, [f'{component_id}.{prop}'])
+            if callback.background:
+                self.submit(callback, body)
+                continue
+            start = time.perf_counter()
+            try:
+                status, content = http_json(self.base_url + '/_dash-update-component', body)
+            except OSError:
+                status, content = None, b''
+            elapsed = time.perf_counter() - start
+            ok = status in (200, 204)
+            self.stats.record(callback.name, elapsed, len(content), ok)
+
+    def submit(self, callback, body):
+        """
+        Start a background callback's job, superseding this user's running job for it
+        """
+        query = {}
+        previous = self.jobs.pop(callback.name, None)
+        if previous is not None:
+            query['oldJob'] = previous['job']
+            self.stats.cancel(callback.name)
+        start = time.perf_counter()
+        try:
+            status, content = http_json(self.url(query), body)
+        except OSError:
+            status, content = None, b''
+        if status != 200:
+            self.stats.record(callback.name, time.perf_counter() - start, len(content), False)
+            return
+        data = json.loads(content)
+        interval = callback.background['interval'] / 1000
+        self.jobs[callback.name] = {
+            'callback': callback, 'body': body, 'started': start, 'interval': interval,
+            'next_poll': time.perf_counter() + interval,
+            'cacheKey': data['cacheKey'], 'job': data['job'], 'cancel': data.get('cancel', []),
+        }
+
+    def poll_jobs(self):
+        """
+        Ask for the result of every running job that is due, recording the ones that finished
+        """
+        for name, job in list(self.jobs.items()):
+            if time.perf_counter() < job['next_poll']:
+                continue
+            try:
+                status, content = http_json(self.url({'cacheKey': job['cacheKey'], 'job': job['job']}), job['body'])
+            except OSError:
+                status, content = None, b''
+            finished = status == 204 or (status == 200 and 'response' in json.loads(content))
+            if finished or status != 200:
+                del self.jobs[name]
+                self.stats.record(name, time.perf_counter() - job['started'], len(content), status in (200, 204))
+            else:
+                job['next_poll'] = time.perf_counter() + job['interval']
+
+    def cancel_jobs(self):
+        """
+        Cancel the jobs still running through their cancel input, so none outlive the test
+        """
+        for name, job in list(self.jobs.items()):
+            for dep in job['cancel']:
+                for callback in self.callbacks:
+                    if callback.triggered_by(dep['id']) and not callback.background:
+                        body = callback.payload(self.values, [f"{dep['id']}.{dep['property']}"])
+                        try:
+                            http_json(self.url({'cancelJob': job['job']}), body)
+                        except OSError:
+                            pass
+            del self.jobs[name]
+
+    def idle(self, seconds):
+        """
+        Wait between actions, polling running jobs at their interval meanwhile
+        """
+        deadline = time.perf_counter() + seconds
+        while True:
+            self.poll_jobs()
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or self.stop.is_set():
+                return
+            if self.jobs:
+                remaining = min(remaining, min(job['next_poll'] for job in self.jobs.values()) - time.perf_counter())
+            self.stop.wait(max(remaining, 0))
+
+    def url(self, query):
+        url = self.base_url + '/_dash-update-component'
+        return f'{url}?{urllib.parse.urlencode(query)}' if query else url
+
+    def drag_slider(self):
+        low, high = self.slider_bounds
+        steps = max(int((high - low) // self.slider_step), 1)
+        a, b = sorted(self.rng.randint(0, steps) for _ in range(2))
+        self.values[('pitches-slider', 'value')] = [low + a * self.slider_step, min(low + b * self.slider_step, high)]
+        self.values[('pitcher-data-table', 'page_current')] = 0
+        self.fire('pitches-slider', 'value')
+
+    def change_teams(self):
+        k = self.rng.choice([0, 1, 1, 2, 3])
+        teams = self.rng.sample(self.team_options, min(k, len(self.team_options)))
+        self.values[('team-dropdown', 'value')] = teams or None
+        self.values[('pitcher-data-table', 'page_current')] = 0
+        self.fire('team-dropdown', 'value')
+
+    def page_table(self):
+        page = self.values.get(('pitcher-data-table', 'page_current')) or 0
+        self.values[('pitcher-data-table', 'page_current')] = max(page + self.rng.choice([-1, 1, 1]), 0)
+        self.fire('pitcher-data-table', 'page_current')
+
+    def run(self):
+        actions = {'slider': self.drag_slider, 'teams': self.change_teams, 'page': self.page_table}
+        names = list(ACTION_WEIGHTS)
+        weights = [ACTION_WEIGHTS[name] for name in names]
+        # Initial page load fires every callback once
+        self.fire('pitches-slider', 'value')
+        self.fire('pitcher-data-table', 'page_current')
+        while not self.stop.is_set():
+            actions[self.rng.choices(names, weights)[0]]()
+            self.idle(self.rng.expovariate(1 / self.think_time) if self.think_time else 0)
+        self.cancel_jobs()
+
+def print_report(rows, elapsed, users):
+    print(f"\n{users} users, {elapsed:.1f}s")
+    print(f"{'callback':<35} {'requests':>9} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'bytes':>9} "
+          f"{'errors':>7} {'cancelled':>9}")
+    for row in rows:
+        print(f"{row['callback']:<35} {row['requests']:>9} {row['throughput_rps']:>8.1f} {row['p50_ms']:>9.1f} "
+              f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['mean_bytes']:>9.0f} {row['error_rate']:>6.1%} "
+              f"{row['cancelled']:>9}")
+    total = sum(row['requests'] for row in rows)
+    print(f"{'total':<35} {total:>9} {total / elapsed:>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay concurrent dashboard callback traffic')
+    parser.add_argument('--url', default='http://127.0.0.1:8050')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent simulated users')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run after ramp-up')
+    parser.add_argument('--ramp', type=float, default=5, help='Seconds over which users start')
+    parser.add_argument('--think-time', type=float, default=0.5, help='Mean seconds between a user\'s actions (0 for none)')
+    parser.add_argument('--ready-timeout', type=float, default=120)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the report as JSON to this file')
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip('/')
+    ready = wait_until_ready(base_url, args.ready_timeout)
+    print(f"Server ready: {ready['records']} records from {ready['source']}")
+
+    _, body = http_json(base_url + '/_dash-dependencies')
+    callbacks = [Callback(dep) for dep in json.loads(body) if not dep.get('clientside_function')]
+    _, body = http_json(base_url + '/_dash-layout')
+    props = layout_props(json.loads(body))
+
+    # Measure only the steady state: samples taken during ramp-up are discarded
+    stats = Stats()
+    stop = threading.Event()
+    users = [VirtualUser(base_url, callbacks, props, stats, stop, args.think_time, args.seed + i)
+             for i in range(args.users)]
+    for user in users:
+        user.start()
+        time.sleep(args.ramp / max(args.users, 1))
+    stats.reset()
+    start = time.perf_counter()
+    time.sleep(args.duration)
+    stop.set()
+    for user in users:
+        user.join()
+    elapsed = time.perf_counter() - start
+
+    rows = stats.report(elapsed)
+    print_report(rows, elapsed, args.users)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'url': base_url, 'users': args.users, 'duration_s': elapsed,
+                       'think_time_s': args.think_time, 'callbacks': rows}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Synthetic pitcher- and pitch-level datasets at configurable sizes
+
+Distributions are loosely based on MLB Statcast data so that filters, charts
+and aggregations see realistic cardinalities and value ranges.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.derived_stats import PITCH_COLUMNS
+
+TEAMS = [
+    'Yankees', 'Red Sox', 'Blue Jays', 'Orioles', 'Rays', 'Guardians', 'Twins', 'Tigers',
+    'White Sox', 'Royals', 'Astros', 'Rangers', 'Mariners', 'Angels', 'Athletics',
+    'Braves', 'Phillies', 'Mets', 'Marlins', 'Nationals', 'Brewers', 'Cubs', 'Reds',
+    'Cardinals', 'Pirates', 'Dodgers', 'Padres', 'Giants', 'Diamondbacks', 'Rockies',
+]
+TEAM_CODES = [
+    'NYY', 'BOS', 'TOR', 'BAL', 'TB', 'CLE', 'MIN', 'DET', 'CWS', 'KC', 'HOU', 'TEX',
+    'SEA', 'LAA', 'OAK', 'ATL', 'PHI', 'NYM', 'MIA', 'WSH', 'MIL', 'CHC', 'CIN', 'STL',
+    'PIT', 'LAD', 'SD', 'SF', 'AZ', 'COL',
+]
+PITCH_TYPES = ['FF', 'SI', 'FC', 'FS', 'CH', 'SL', 'CU']
+# Typical league-wide pitch mix, in PITCH_TYPES order
+PITCH_MIX = np.array([0.33, 0.15, 0.07, 0.03, 0.11, 0.2, 0.11])
+# Velocity offset of each pitch type relative to the four-seamer
+PITCH_VELO_OFFSET = np.array([0.0, -0.8, -4.5, -8.0, -8.5, -8.0, -14.0])
+
+def generate_pitchers(n, seed=0):
+    """
+    Generate n pitcher-level rows with the columns of ads_game_pitcher_stats_f
+
+    Args:
+        n: Number of rows
+        seed: Random seed
+
+    Returns:
+        DataFrame shaped like the table connect_to_database reads
+    """
+    rng = np.random.default_rng(seed)
+    pitches = np.clip(rng.lognormal(np.log(60), 0.6, n), 5, 4000).astype(np.int64)
+
+    # Pitch mix: Dirichlet around the league mix, as percentages rounded like the source table
+    mix = rng.dirichlet(PITCH_MIX * 12, n) * 100
+    max_velo = rng.normal(96, 2.5, n)
+
+    bip = rng.binomial(pitches, 0.17)
+    hard_hit = rng.binomial(bip, rng.beta(38, 62, n))
+    barrels = rng.binomial(bip, rng.beta(7, 93, n))
+    strikeouts = rng.binomial(np.maximum(pitches // 4, 1), 0.22)
+    ab = bip + strikeouts
+    hits = rng.binomial(bip, 0.3)
+    home_runs = rng.binomial(hits, 0.12)
+    triples = rng.binomial(hits - home_runs, 0.02)
+    doubles = rng.binomial(hits - home_runs - triples, 0.22)
+    singles = hits - home_runs - triples - doubles
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        data = {
+            'player_id': np.arange(100000, 100000 + n),
+            'name': [f'Pitcher {i}' for i in range(1, n + 1)],
+            'team': np.asarray(TEAMS, dtype=object)[rng.integers(0, len(TEAMS), n)],
+            'pitches': pitches,
+            'max_velo': max_velo.round(1),
+            'min_velo': (max_velo - rng.uniform(8, 20, n)).round(1),
+        }
+        data.update({col: mix[:, i].round(1) for i, col in enumerate(PITCH_COLUMNS)})
+        data.update({
+            'max_ev': np.where(bip > 0, rng.normal(104, 5, n), np.nan).round(1),
+            'hard_hit': hard_hit,
+            'hard_hit_pct': np.round(hard_hit / bip * 100, 1),
+            'barrels': barrels,
+            'barrel_pct': np.round(barrels / bip * 100, 1),
+            'ab': ab,
+            'avg': np.round(hits / ab, 3),
+            'hits': hits,
+            'singles': singles,
+            'doubles': doubles,
+            'triples': triples,
+            'home_runs': home_runs,
+            'strikeouts': strikeouts,
+            'bip': bip,
+        })
+    return pd.DataFrame(data)
+
+def generate_pitches(n, seed=0, n_pitchers=None, start_date='2024-03-28', seasons=1):
+    """
+    Generate n pitch-level rows in Statcast CSV export format
+
+    Args:
+        n: Number of pitches
+        seed: Random seed
+        n_pitchers: Number of distinct pitchers (default scales with n)
+        start_date: Date of the first game
+        seasons: Number of seasons the games are spread over
+
+    Returns:
+        DataFrame with the Statcast columns utils.statcast_loader reads
+    """
+    rng = np.random.default_rng(seed)
+    n_pitchers = n_pitchers or max(10, min(n // 500, 2000))
+    pitches_per_game = 290
+    n_games = max(1, n // pitches_per_game)
+
+    game = np.sort(rng.integers(0, n_games, n))
+    pitch_in_game = np.arange(n) - np.searchsorted(game, game)
+    at_bat = pitch_in_game // 4
+    pitch_number = pitch_in_game % 4 + 1
+
+    # Spread games over 186-day seasons starting a year apart
+    game_day = (np.arange(n_games) * (186 * seasons) // n_games)
+    season = game_day // 186
+    game_dates = (pd.Timestamp(start_date) + pd.to_timedelta(season * 365 + game_day % 186, unit='D'))
+    home = rng.integers(0, len(TEAM_CODES), n_games)
+    away = (home + rng.integers(1, len(TEAM_CODES), n_games)) % len(TEAM_CODES)
+
+    pitch_type = rng.choice(len(PITCH_TYPES), n, p=PITCH_MIX / PITCH_MIX.sum())
+    pitcher = rng.integers(0, n_pitchers, n)
+    velo = rng.normal(94, 2, n_pitchers)[pitcher] + PITCH_VELO_OFFSET[pitch_type] + rng.normal(0, 1, n)
+
+    # The last pitch of each at-bat ends it; a share of those are balls in play
+    final = pitch_number == 4
+    in_play = final & (rng.random(n) < 0.68)
+    events = np.full(n, None, dtype=object)
+    events[final] = 'strikeout'
+    in_play_results = np.array(['field_out', 'single', 'double', 'triple', 'home_run'], dtype=object)
+    events[in_play] = in_play_results[rng.choice(5, int(in_play.sum()), p=[0.69, 0.2, 0.065, 0.005, 0.04])]
+    walks = final & ~in_play & (rng.random(n) < 0.3)
+    events[walks] = 'walk'
+    launch_speed = np.where(in_play, rng.normal(89, 14, n), np.nan).round(1)
+    launch_angle = np.where(in_play, rng.normal(12, 25, n), np.nan).round(1)
+    bb_type = np.full(n, None, dtype=object)
+    bb_type[in_play] = np.array(['ground_ball', 'line_drive', 'fly_ball', 'popup'], dtype=object)[
+        rng.choice(4, int(in_play.sum()), p=[0.43, 0.25, 0.25, 0.07])]
+    top = at_bat % 2 == 0
+
+    return pd.DataFrame({
+        'pitch_type': np.asarray(PITCH_TYPES, dtype=object)[pitch_type],
+        'game_date': game_dates[game].strftime('%Y-%m-%d'),
+        'release_speed': velo.round(1),
+        'player_name': [f'Pitcher, {i}' for i in pitcher],
+        'batter': 600000 + rng.integers(0, n_pitchers * 3, n),
+        'pitcher': 100000 + pitcher,
+        'events': events,
+        'home_team': np.asarray(TEAM_CODES, dtype=object)[home[game]],
+        'away_team': np.asarray(TEAM_CODES, dtype=object)[away[game]],
+        'type': np.where(in_play, 'X', np.where(rng.random(n) < 0.5, 'S', 'B')),
+        'bb_type': bb_type,
+        'balls': rng.integers(0, 4, n),
+        'strikes': rng.integers(0, 3, n),
+        'pfx_x': rng.normal(0, 0.8, n).round(2),
+        'pfx_z': rng.normal(0.8, 0.6, n).round(2),
+        'plate_x': rng.normal(0, 0.8, n).round(2),
+        'plate_z': rng.normal(2.4, 0.9, n).round(2),
+        'outs_when_up': rng.integers(0, 3, n),
+        'inning': np.minimum(at_bat // 8 + 1, 9),
+        'inning_topbot': np.where(top, 'Top', 'Bot'),
+        'hit_distance_sc': np.where(in_play, np.clip(rng.normal(180, 110, n), 0, 480), np.nan).round(),
+        'launch_speed': launch_speed,
+        'launch_angle': launch_angle,
+        'release_spin_rate': rng.normal(2300, 300, n).round(),
+        'game_pk': 700000 + game,
+        'at_bat_number': at_bat + 1,
+        'pitch_number': pitch_number,
+        'launch_speed_angle': np.where(in_play, rng.choice(6, n, p=[0.05, 0.3, 0.3, 0.2, 0.08, 0.07]) + 1, np.nan),
+        'bat_score': 0,
+        'post_bat_score': np.where(events == 'home_run', 1, 0),
+    })
@@ -3,19 +3,26 @@ import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
 
-def create_pitch_type_chart(df):
+from utils.data_processing import decimal_values
+from utils.derived_stats import PITCH_COLUMNS, PITCH_NAMES, BATTING_COLUMNS, BATTING_NAMES
+from utils.comparison_index import ComparisonIndex, RADAR_METRICS, RADAR_NAMES
+from components.figure_templates import FigureTemplate, group_rows
+
+def pitch_type_averages(df):
     """
-    Create pitcher's pitch type distribution chart
+    Calculate average usage rate for each pitch type, in PITCH_COLUMNS order
     """
-    pitch_columns = ['ff_pct', 'si_pct', 'fc_pct', 'fs_pct', 'ch_pct', 'sl_pct', 'cu_pct']
-    pitch_names = ['Four-Seam', 'Sinker', 'Cutter', 'Split-Finger', 'Changeup', 'Slider', 'Curveball']
-    
-    # Calculate average usage rate for each pitch type
-    pitch_avg = df[pitch_columns].mean().reset_index()
-    pitch_avg.columns = ['pitch_type', 'percentage']
-    pitch_avg['pitch_name'] = pitch_names
+    # Averaged in float64 so results match the summary cube, whatever the stored dtype
+    return df[PITCH_COLUMNS].astype(np.float64).mean().tolist()
+
+def _pitch_type_skeleton():
+    pitch_avg = pd.DataFrame({
+        'pitch_type': PITCH_COLUMNS,
+        'percentage': [0.0] * len(PITCH_COLUMNS),
+        'pitch_name': PITCH_NAMES
+    })
     
-    fig = px.bar(
+    return px.bar(
         pitch_avg, 
         x='pitch_name',
         y='percentage',
@@ -24,58 +31,216 @@ def create_pitch_type_chart(df):
         color='pitch_name',
         color_discrete_sequence=px.colors.qualitative.G10
     )
+
+PITCH_TYPE_TEMPLATE = FigureTemplate(_pitch_type_skeleton)
+
+def create_pitch_type_chart(df=None, averages=None):
+    """
+    Create pitcher's pitch type distribution chart
     
-    return fig
+    Args:
+        df: Filtered pitcher data
+        averages: Precomputed pitch_type_averages, used instead of df when given
+    
+    Returns:
+        Figure dict, one bar trace per pitch type
+    """
+    if averages is None:
+        averages = pitch_type_averages(df)
+    
+    return PITCH_TYPE_TEMPLATE.render_bars(averages)
 
-def create_velocity_vs_hardHit_chart(df):
+def linear_trend(x, y):
     """
-    Create scatter plot showing relationship between velocity and hard-hit rate
+    Least-squares line through the finite (x, y) pairs
+    
+    Returns:
+        Tuple of (slope, intercept), or None if there are too few distinct points
     """
-    fig = px.scatter(
-        df,
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    finite = np.isfinite(x) & np.isfinite(y)
+    if finite.sum() < 2 or np.ptp(x[finite]) == 0:
+        return None
+    slope, intercept = np.polyfit(x[finite], y[finite], 1)
+    return slope, intercept
+
+def reduce_scatter_points(df, x, y, max_points, grid_size=64, outlier_z=3.0, seed=0):
+    """
+    Down-sample scatter data while preserving its density and outliers
+    
+    Points are binned on a grid_size x grid_size grid and every cell keeps at
+    most the same number of points, chosen so the total fits max_points. Sparse
+    regions therefore keep all their points while dense ones are thinned.
+    Points more than outlier_z standard deviations out on either axis are
+    always kept, so their hover names survive.
+    
+    Args:
+        df: Data to reduce
+        x, y: Column names of the plotted axes
+        max_points: Target number of points to keep
+    
+    Returns:
+        DataFrame with at most max_points rows plus outliers
+    """
+    xs = df[x].to_numpy(dtype=float, na_value=np.nan)
+    ys = df[y].to_numpy(dtype=float, na_value=np.nan)
+    finite = np.flatnonzero(np.isfinite(xs) & np.isfinite(ys))
+    if len(finite) <= max_points:
+        return df.iloc[finite]
+    xs, ys = xs[finite], ys[finite]
+    
+    # Outliers on either axis are always kept
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.maximum(np.abs((xs - xs.mean()) / xs.std()), np.abs((ys - ys.mean()) / ys.std()))
+    outlier = np.nan_to_num(z) > outlier_z
+    budget = max(max_points - int(outlier.sum()), 0)
+    
+    # Bin every point into a grid cell
+    def bin_index(values):
+        low, high = values.min(), values.max()
+        if high == low:
+            return np.zeros(len(values), dtype=np.int64)
+        return np.minimum(((values - low) / (high - low) * grid_size).astype(np.int64), grid_size - 1)
+    cells = bin_index(xs) * grid_size + bin_index(ys)
+    
+    # Rank points within their cell in random order
+    rng = np.random.default_rng(seed)
+    order = np.lexsort((rng.random(len(cells)), cells))
+    sorted_cells = cells[order]
+    starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]])
+    counts = np.diff(np.r_[starts, len(sorted_cells)])
+    rank = np.empty(len(cells), dtype=np.int64)
+    rank[order] = np.arange(len(cells)) - np.repeat(starts, counts)
+    
+    # Largest per-cell cap whose total stays within the budget
+    low, high = 0, int(counts.max())
+    while low < high:
+        cap = (low + high + 1) // 2
+        if np.minimum(counts, cap).sum() <= budget:
+            low = cap
+        else:
+            high = cap - 1
+    
+    keep = outlier | (rank < low)
+    return df.iloc[finite[keep]]
+
+# Above WEBGL_THRESHOLD points the scatter renders with WebGL; above
+# MAX_SCATTER_POINTS it is reduced on the server before being sent
+WEBGL_THRESHOLD = 1000
+MAX_SCATTER_POINTS = 5000
+
+VELOCITY_LABELS = {
+    'max_velo': 'Max Velocity (mph)',
+    'hard_hit_pct': 'Hard-Hit Rate (%)',
+    'pitches': 'Pitch Count'
+}
+# Plotly Express default largest marker diameter, which sets the size scale
+SIZE_MAX = 20
+# Team name the skeleton is drawn with, replaced in each trace's hover template
+TEAM_PLACEHOLDER = '__team__'
+
+def _velocity_skeleton(render_mode):
+    sample = pd.DataFrame({
+        'max_velo': [0.0],
+        'hard_hit_pct': [0.0],
+        'pitches': [1],
+        'team': [TEAM_PLACEHOLDER],
+        'name': ['']
+    })
+    
+    return px.scatter(
+        sample,
         x='max_velo',
         y='hard_hit_pct',
         size='pitches',
         color='team',
         hover_name='name',
         title='Velocity vs Hard-Hit Rate Relationship',
-        labels={
-            'max_velo': 'Max Velocity (mph)',
-            'hard_hit_pct': 'Hard-Hit Rate (%)',
-            'pitches': 'Pitch Count'
-        }
+        labels=VELOCITY_LABELS,
+        size_max=SIZE_MAX,
+        render_mode=render_mode
     )
-    
-    # Add trend line
-    fig.add_trace(
-        go.Scatter(
-            x=df['max_velo'],
-            y=df['max_velo'] * 0.5 + 15,  # Simulated trend line, should use regression in practice
-            mode='lines',
-            name='Trend Line',
-            line=dict(color='rgba(0,0,0,0.3)', dash='dash')
-        )
-    )
-    
-    return fig
 
-def create_batting_results_chart(df):
+# SVG and WebGL traces take different attributes, so each render mode has its own skeleton
+VELOCITY_TEMPLATES = {
+    render_mode: FigureTemplate(lambda render_mode=render_mode: _velocity_skeleton(render_mode))
+    for render_mode in ('svg', 'webgl')
+}
+
+def create_velocity_vs_hardHit_chart(df, webgl_threshold=WEBGL_THRESHOLD, max_points=MAX_SCATTER_POINTS):
     """
-    Create batting results analysis chart
+    Create scatter plot showing relationship between velocity and hard-hit rate
+    
+    Args:
+        df: Filtered pitcher data
+        webgl_threshold: Point count above which WebGL traces are used
+        max_points: Point count above which points are reduced on the server
+    
+    Returns:
+        Figure dict with one marker trace per team, in order of first appearance, and the trend line
     """
-    batting_cols = ['singles', 'doubles', 'triples', 'home_runs', 'strikeouts']
-    batting_names = ['Singles', 'Doubles', 'Triples', 'Home Runs', 'Strikeouts']
-    
-    batting_data = []
-    for i, col in enumerate(batting_cols):
-        batting_data.append({
-            'result_type': batting_names[i],
-            'avg_count': df[col].mean()
+    title = 'Velocity vs Hard-Hit Rate Relationship'
+    plot_df = df
+    if len(df) > max_points:
+        plot_df = reduce_scatter_points(df, 'max_velo', 'hard_hit_pct', max_points)
+        title += f' ({len(plot_df):,} of {len(df):,} pitchers shown)'
+    
+    # float32 columns would serialize as e.g. 95.30000305175781; send them at their source precision
+    x, y = decimal_values(plot_df['max_velo'], 'max_velo'), decimal_values(plot_df['hard_hit_pct'], 'hard_hit_pct')
+    sizes = plot_df['pitches'].to_numpy()
+    names = plot_df['name'].to_numpy(dtype=object, na_value=None)
+    
+    # One trace per team filled into the skeleton trace, as Plotly Express would draw them
+    template = VELOCITY_TEMPLATES['webgl' if len(df) > webgl_threshold else 'svg']
+    skeleton = template.traces[0]
+    colorway = template.colorway
+    sizeref = np.nanmax(sizes) / SIZE_MAX ** 2 if len(sizes) else 0
+    traces = []
+    for i, (team, rows) in enumerate(group_rows(plot_df['team'].to_numpy(dtype=object))):
+        if pd.isna(team):
+            continue
+        team = str(team)
+        traces.append(dict(
+            skeleton,
+            hovertemplate=skeleton['hovertemplate'].replace(TEAM_PLACEHOLDER, team),
+            hovertext=names[rows],
+            legendgroup=team,
+            marker=dict(skeleton['marker'], color=colorway[i % len(colorway)], size=sizes[rows], sizeref=sizeref),
+            name=team,
+            x=x[rows],
+            y=y[rows]
+        ))
+    
+    # Add trend line fitted on the full data, not the reduced points
+    trend = linear_trend(df['max_velo'], df['hard_hit_pct'])
+    if trend is not None:
+        slope, intercept = trend
+        x_range = decimal_values([df['max_velo'].min(), df['max_velo'].max()], 'max_velo').astype(float)
+        traces.append({
+            'line': {'color': 'rgba(0,0,0,0.3)', 'dash': 'dash'},
+            'mode': 'lines',
+            'name': 'Trend Line',
+            'x': x_range,
+            'y': slope * x_range + intercept,
+            'type': 'scatter'
         })
     
-    batting_df = pd.DataFrame(batting_data)
+    return template.render(traces, title=title)
+
+def batting_result_averages(df):
+    """
+    Calculate average count of each batting result, in BATTING_COLUMNS order
+    """
+    return df[BATTING_COLUMNS].astype(np.float64).mean().tolist()
+
+def _batting_results_skeleton():
+    batting_df = pd.DataFrame({
+        'result_type': BATTING_NAMES,
+        'avg_count': [0.0] * len(BATTING_NAMES)
+    })
     
-    fig = px.bar(
+    return px.bar(
         batting_df,
         x='result_type',
         y='avg_count',
@@ -84,47 +249,59 @@ def create_batting_results_chart(df):
         color='result_type',
         color_discrete_sequence=px.colors.qualitative.Pastel
     )
-    
-    return fig
 
-def create_pitcher_comparison_radar(df, pitcher1_id, pitcher2_id=None):
+BATTING_RESULTS_TEMPLATE = FigureTemplate(_batting_results_skeleton)
+
+def create_batting_results_chart(df=None, averages=None):
     """
-    Create radar chart comparing pitcher abilities
+    Create batting results analysis chart
+    
+    Args:
+        df: Filtered pitcher data
+        averages: Precomputed batting_result_averages, used instead of df when given
+    
+    Returns:
+        Figure dict, one bar trace per result type
     """
-    # Select metrics to display in radar chart
-    metrics = ['max_velo', 'strikeouts', 'hard_hit_pct', 'barrel_pct', 'avg']
-    metric_names = ['Max Velocity', 'Strikeouts', 'Hard-Hit Rate', 'Barrel Rate', 'Batting Avg']
+    if averages is None:
+        averages = batting_result_averages(df)
     
-    # Normalize data to make all metrics on 0-1 scale
-    normalized_df = df.copy()
-    for metric in metrics:
-        if metric == 'avg':  # For batting average, lower is better
-            normalized_df[f'{metric}_norm'] = 1 - (df[metric] - df[metric].min()) / (df[metric].max() - df[metric].min())
-        else:  # For other metrics, higher is better
-            normalized_df[f'{metric}_norm'] = (df[metric] - df[metric].min()) / (df[metric].max() - df[metric].min())
+    return BATTING_RESULTS_TEMPLATE.render_bars(averages)
+
+def create_pitcher_comparison_radar(df, pitcher_ids, comparison=None):
+    """
+    Create radar chart comparing the abilities of any number of pitchers
+    
+    Args:
+        df: Pitcher data
+        pitcher_ids: player_id of each pitcher to compare
+        comparison: Precomputed ComparisonIndex for df, built on the fly when omitted
+    """
+    if comparison is None:
+        comparison = ComparisonIndex(df)
     
-    # Get data for pitcher 1
-    pitcher1_data = normalized_df[normalized_df['player_id'] == pitcher1_id]
+    # Metrics are min-max scaled across all pitchers (0-1, higher is better); hover shows the raw value and percentile
+    rows = comparison.rows(pitcher_ids)
+    values, scaled, percentiles = comparison.scores(rows)
+    # Hover values at their source precision rather than as widened float32
+    for j, metric in enumerate(comparison.metrics):
+        if df[metric].dtype == np.float32:
+            values[:, j] = decimal_values(values[:, j].astype(np.float32), metric)
+    metric_names = [RADAR_NAMES[RADAR_METRICS.index(metric)] for metric in comparison.metrics]
+    # Only the compared rows, so a string column is never converted as a whole
+    names = df['name'].iloc[rows].tolist()
     
     # Set up radar chart
     fig = go.Figure()
     
-    # Add data for pitcher 1
-    fig.add_trace(go.Scatterpolar(
-        r=[pitcher1_data[f'{metric}_norm'].values[0] for metric in metrics],
-        theta=metric_names,
-        fill='toself',
-        name=pitcher1_data['name'].values[0]
-    ))
-    
-    # If a second pitcher is provided, add their data
-    if pitcher2_id is not None:
-        pitcher2_data = normalized_df[normalized_df['player_id'] == pitcher2_id]
+    for i in range(len(rows)):
         fig.add_trace(go.Scatterpolar(
-            r=[pitcher2_data[f'{metric}_norm'].values[0] for metric in metrics],
+            r=scaled[i],
             theta=metric_names,
+            customdata=np.column_stack([values[i], percentiles[i] * 100]),
+            hovertemplate='%{theta}: %{customdata[0]:.3~f} (%{customdata[1]:.0f}th percentile)<extra></extra>',
             fill='toself',
-            name=pitcher2_data['name'].values[0]
+            name=str(names[i])
         ))
     
     # Set radar chart layout
@@ -140,24 +317,41 @@ def create_pitcher_comparison_radar(df, pitcher1_id, pitcher2_id=None):
     
     return fig
 
-def create_pitch_distribution_pie(df, pitcher_id):
+def create_empty_chart(message):
+    """
+    Create a blank chart showing a message, for views with nothing selected
+    """
+    fig = go.Figure()
+    fig.update_layout(
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False),
+        annotations=[dict(text=message, showarrow=False, font=dict(size=16))]
+    )
+    return fig
+
+def create_pitch_distribution_pie(df, pitcher_id, comparison=None):
     """
     Create pie chart of pitcher's pitch type distribution
+    
+    Args:
+        df: Pitcher data
+        pitcher_id: player_id of the pitcher
+        comparison: Precomputed ComparisonIndex for df, used to find the pitcher's row
     """
-    pitcher_data = df[df['player_id'] == pitcher_id]
+    if comparison is None:
+        comparison = ComparisonIndex(df)
+    rows = comparison.rows([pitcher_id])
     
-    if pitcher_data.empty:
+    if len(rows) == 0:
         return None
     
-    pitch_columns = ['ff_pct', 'si_pct', 'fc_pct', 'fs_pct', 'ch_pct', 'sl_pct', 'cu_pct']
-    pitch_names = ['Four-Seam', 'Sinker', 'Cutter', 'Split-Finger', 'Changeup', 'Slider', 'Curveball']
-    
-    values = [pitcher_data[col].values[0] for col in pitch_columns]
+    pitcher_data = df.iloc[rows[0]]
+    values = [decimal_values(pitcher_data[col], col).item() for col in PITCH_COLUMNS]
     
     fig = px.pie(
         values=values,
-        names=pitch_names,
-        title=f"{pitcher_data['name'].values[0]} Pitch Distribution",
+        names=PITCH_NAMES,
+        title=f"{pitcher_data['name']} Pitch Distribution",
         hole=0.3,
         color_discrete_sequence=px.colors.qualitative.Safe
     )
@@ -172,9 +366,13 @@ def create_velocity_histogram(df, team=None):
         filtered_df = df[df['team'] == team]
     else:
         filtered_df = df
+    if filtered_df.empty:
+        return create_empty_chart('No pitchers match the filters')
     
     fig = px.histogram(
-        filtered_df,
+        # Plain strings so only teams present in the data get a trace
+        filtered_df.assign(team=filtered_df['team'].astype(object),
+                           max_velo=decimal_values(filtered_df['max_velo'], 'max_velo')),
         x='max_velo',
         nbins=20,
         title='Pitcher Maximum Velocity Distribution',
@@ -190,33 +388,68 @@ def create_velocity_histogram(df, team=None):
     
     return fig
 
-def create_strikeout_vs_hits_scatter(df):
+def create_strikeout_vs_hits_scatter(df, webgl_threshold=WEBGL_THRESHOLD, max_points=MAX_SCATTER_POINTS):
     """
-    Create strikeouts vs hits scatter plot
+    Create strikeouts vs hits scatter plot with a least-squares trend line per team
+    
+    Args:
+        df: Filtered pitcher data
+        webgl_threshold: Point count above which WebGL traces are used
+        max_points: Point count above which points are reduced on the server
     """
+    if df.empty:
+        return create_empty_chart('No pitchers match the filters')
+    title = 'Strikeouts vs Hits Relationship'
+    plot_df = df
+    if len(df) > max_points:
+        plot_df = reduce_scatter_points(df, 'strikeouts', 'hits', max_points)
+        title += f' ({len(plot_df):,} of {len(df):,} pitchers shown)'
+    
     fig = px.scatter(
-        df,
+        plot_df.assign(team=plot_df['team'].astype(object),
+                       name=plot_df['name'].to_numpy(dtype=object, na_value=None)),
         x='strikeouts',
         y='hits',
         size='pitches',
         color='team',
         hover_name='name',
-        title='Strikeouts vs Hits Relationship',
+        title=title,
         labels={
             'strikeouts': 'Strikeouts',
             'hits': 'Hits',
             'pitches': 'Pitch Count'
         },
-        trendline='ols'  # Add trend line
+        render_mode='webgl' if len(df) > webgl_threshold else 'svg'
     )
     
+    # Trend lines fitted per team on the full data, drawn in the team's colour as trendline='ols' would
+    colors = {trace.name: trace.marker.color for trace in fig.data}
+    for team, team_df in df.groupby('team', observed=True, sort=False):
+        trend = linear_trend(team_df['strikeouts'], team_df['hits'])
+        if trend is None or str(team) not in colors:
+            continue
+        slope, intercept = trend
+        x_range = decimal_values([team_df['strikeouts'].min(), team_df['strikeouts'].max()], 'strikeouts').astype(float)
+        fig.add_trace(go.Scatter(
+            x=x_range,
+            y=slope * x_range + intercept,
+            mode='lines',
+            name=str(team),
+            legendgroup=str(team),
+            showlegend=False,
+            line={'color': colors[str(team)]},
+            hovertemplate=f'{team} trend<br>hits = {slope:.3f} * strikeouts + {intercept:.2f}<extra></extra>'
+        ))
+    
     return fig
 
 def create_team_performance_comparison(df):
     """
     Create team pitcher performance comparison chart
     """
-    team_stats = df.groupby('team').agg({
+    if df.empty:
+        return create_empty_chart('No pitchers match the filters')
+    team_stats = df.groupby('team', observed=True).agg({
         'max_velo': 'mean',
         'strikeouts': 'mean',
         'hard_hit_pct': 'mean',
@@ -0,0 +1,85 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+class FigureTemplate:
+    """
+    Chart skeleton built once and filled with new data arrays on every request
+
+    The skeleton is the figure build returns, drawn from placeholder data and
+    converted to plain dicts the first time the template is used. Rendering
+    copies only the traces it fills and shares the skeleton's layout, so a
+    response no longer runs Plotly Express or figure validation. Figures a
+    template returns are plain dicts and must be treated as read-only.
+
+    Args:
+        build: Function returning the go.Figure used as the skeleton
+    """
+    def __init__(self, build):
+        self._build = build
+        self._skeleton = None
+        self._lock = threading.Lock()
+
+    @property
+    def skeleton(self):
+        with self._lock:
+            if self._skeleton is None:
+                self._skeleton = self._build().to_plotly_json()
+            return self._skeleton
+
+    @property
+    def traces(self):
+        return self.skeleton['data']
+
+    @property
+    def layout(self):
+        return self.skeleton['layout']
+
+    @property
+    def colorway(self):
+        """
+        Colours Plotly Express assigns to groups, in order
+        """
+        return self.layout['template']['layout']['colorway']
+
+    def render(self, traces, title=None):
+        """
+        Figure dict with the given traces on the skeleton's layout
+
+        Args:
+            traces: List of trace dicts
+            title: Chart title replacing the skeleton's
+        """
+        layout = self.layout
+        if title is not None:
+            layout = {**layout, 'title': {**layout.get('title', {}), 'text': title}}
+        return {'data': traces, 'layout': layout}
+
+    def render_bars(self, values):
+        """
+        Figure dict of a one-bar-per-trace chart with the given bar heights
+
+        Every category keeps its own trace, so the figure can later be updated
+        in place by patching data[i].y as before.
+
+        Args:
+            values: Bar height of each skeleton trace, in trace order
+        """
+        traces = [dict(trace, y=np.array([value], dtype=np.float64)) for trace, value in zip(self.traces, values)]
+        return self.render(traces)
+
+def group_rows(values):
+    """
+    Row positions of each distinct value, in order of first appearance as Plotly Express groups them
+
+    Missing values form a group of their own: Plotly Express gives it a colour
+    slot even though it draws no trace for it.
+
+    Returns:
+        List of (value, positions) tuples
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(-1, len(uniques)), side='right')
+    return [(value, order[bounds[i]:bounds[i + 1]]) for i, value in enumerate(uniques)]
@@ -149,3 +149,49 @@ CREATE TABLE IF NOT EXISTS ads_game_pitcher_stats_f (
     strikeouts INTEGER,  
     bip INTEGER 
 );
+
+-- Watermarks for incremental jobs: the last (event_timestamp, game_id, pitch_id) folded in
+CREATE TABLE IF NOT EXISTS etl_watermarks (
+    job_name VARCHAR(50) PRIMARY KEY,
+    last_event_timestamp TIMESTAMP NOT NULL DEFAULT '-infinity',
+    last_game_id INTEGER NOT NULL DEFAULT 0,
+    last_pitch_id INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT now()
+);
+
+-- Additive per-pitcher counters that ads_game_pitcher_stats_f is derived from
+CREATE TABLE IF NOT EXISTS dws_pitcher_rollup_state (
+    player_id INTEGER PRIMARY KEY,
+    pitches INTEGER NOT NULL DEFAULT 0,
+    ff_count INTEGER NOT NULL DEFAULT 0,
+    si_count INTEGER NOT NULL DEFAULT 0,
+    fc_count INTEGER NOT NULL DEFAULT 0,
+    fs_count INTEGER NOT NULL DEFAULT 0,
+    ch_count INTEGER NOT NULL DEFAULT 0,
+    sl_count INTEGER NOT NULL DEFAULT 0,
+    cu_count INTEGER NOT NULL DEFAULT 0,
+    max_velo DECIMAL(5,1),
+    min_velo DECIMAL(5,1),
+    max_ev DECIMAL(5,1),
+    hard_hit INTEGER NOT NULL DEFAULT 0,
+    barrels INTEGER NOT NULL DEFAULT 0,
+    bip INTEGER NOT NULL DEFAULT 0,
+    ab INTEGER NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    singles INTEGER NOT NULL DEFAULT 0,
+    doubles INTEGER NOT NULL DEFAULT 0,
+    triples INTEGER NOT NULL DEFAULT 0,
+    home_runs INTEGER NOT NULL DEFAULT 0,
+    strikeouts INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (player_id) REFERENCES players(player_id)
+);
+
+-- Batches committed by the Statcast bulk loader, used to resume interrupted loads
+CREATE TABLE IF NOT EXISTS ingest_batches (
+    source_name VARCHAR(255) NOT NULL,
+    batch_no INTEGER NOT NULL,
+    rows_loaded INTEGER NOT NULL,
+    rows_rejected INTEGER NOT NULL DEFAULT 0,
+    loaded_at TIMESTAMP DEFAULT now(),
+    PRIMARY KEY (source_name, batch_no)
+);
@@ -0,0 +1,80 @@
+-- Range-partition pitch_events by game date, one partition per season (calendar year)
+--
+-- The partition key has to be a column of the table, so pitch_events gains
+-- game_date, copied from games. Unique constraints on a partitioned table must
+-- include the partition key, so the primary key becomes (pitch_id, game_date)
+-- and pitch_id alone can no longer be referenced by a foreign key: the
+-- references from batted_ball_events and pitcher_batter_outcomes are dropped.
+-- pitch_id values still all come from the one sequence and stay unique.
+--
+-- There is no default partition. Loaders call ensure_pitch_events_partition()
+-- for the seasons they write before copying rows in.
+
+ALTER TABLE batted_ball_events DROP CONSTRAINT IF EXISTS batted_ball_events_pitch_id_fkey;
+ALTER TABLE pitcher_batter_outcomes DROP CONSTRAINT IF EXISTS pitcher_batter_outcomes_final_pitch_id_fkey;
+
+ALTER TABLE pitch_events RENAME TO pitch_events_unpartitioned;
+ALTER INDEX pitch_events_pkey RENAME TO pitch_events_unpartitioned_pkey;
+-- Keep the id sequence when the old table is dropped
+ALTER SEQUENCE pitch_events_pitch_id_seq OWNED BY NONE;
+
+CREATE TABLE pitch_events (
+    pitch_id INTEGER NOT NULL DEFAULT nextval('pitch_events_pitch_id_seq'),
+    game_id INTEGER NOT NULL,
+    inning INTEGER NOT NULL,
+    half_inning VARCHAR(10) NOT NULL,
+    pitcher_id INTEGER NOT NULL,
+    batter_id INTEGER NOT NULL,
+    pitch_number INTEGER,
+    pitch_type VARCHAR(5),
+    pitch_velocity DECIMAL(5,1),
+    pitch_spin_rate INTEGER,
+    pitch_horizontal_movement DECIMAL(5,2),
+    pitch_vertical_movement DECIMAL(5,2),
+    pitch_location_x DECIMAL(5,2),
+    pitch_location_y DECIMAL(5,2),
+    balls_count INTEGER,
+    strikes_count INTEGER,
+    outs_count INTEGER,
+    event_timestamp TIMESTAMP,
+    game_date DATE NOT NULL,
+    CONSTRAINT pitch_events_pkey PRIMARY KEY (pitch_id, game_date),
+    CONSTRAINT pitch_events_game_id_fkey FOREIGN KEY (game_id) REFERENCES games(game_id),
+    CONSTRAINT pitch_events_pitcher_id_fkey FOREIGN KEY (pitcher_id) REFERENCES players(player_id),
+    CONSTRAINT pitch_events_batter_id_fkey FOREIGN KEY (batter_id) REFERENCES players(player_id)
+) PARTITION BY RANGE (game_date);
+
+ALTER SEQUENCE pitch_events_pitch_id_seq OWNED BY pitch_events.pitch_id;
+
+-- Create the partition holding one season's pitches if it does not exist yet
+CREATE OR REPLACE FUNCTION ensure_pitch_events_partition(season INTEGER) RETURNS VOID AS $$
+BEGIN
+    -- Checked first so existing seasons never take the lock CREATE TABLE ... PARTITION OF needs
+    IF to_regclass('pitch_events_' || season) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF pitch_events FOR VALUES FROM (%L) TO (%L)',
+            'pitch_events_' || season, make_date(season, 1, 1), make_date(season + 1, 1, 1)
+        );
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_pitch_events_partition(season)
+FROM (SELECT DISTINCT EXTRACT(YEAR FROM game_date)::INTEGER AS season FROM games) AS seasons;
+
+INSERT INTO pitch_events (
+    pitch_id, game_id, inning, half_inning, pitcher_id, batter_id, pitch_number,
+    pitch_type, pitch_velocity, pitch_spin_rate, pitch_horizontal_movement,
+    pitch_vertical_movement, pitch_location_x, pitch_location_y, balls_count,
+    strikes_count, outs_count, event_timestamp, game_date
+)
+SELECT p.pitch_id, p.game_id, p.inning, p.half_inning, p.pitcher_id, p.batter_id, p.pitch_number,
+       p.pitch_type, p.pitch_velocity, p.pitch_spin_rate, p.pitch_horizontal_movement,
+       p.pitch_vertical_movement, p.pitch_location_x, p.pitch_location_y, p.balls_count,
+       p.strikes_count, p.outs_count, p.event_timestamp, g.game_date
+FROM pitch_events_unpartitioned p
+JOIN games g ON g.game_id = p.game_id;
+
+DROP TABLE pitch_events_unpartitioned;
+
+ANALYZE pitch_events;
@@ -0,0 +1,32 @@
+-- Secondary indexes for the pitch-level tables
+--
+-- Indexes on pitch_events are created on the partitioned table, so every
+-- season partition, including ones created later, gets its own copy.
+
+-- Per-pitcher and per-pitcher-per-game lookups. The included columns let
+-- per-pitcher aggregates and the dashboard's game-date filter run as
+-- index-only scans.
+CREATE INDEX IF NOT EXISTS pitch_events_pitcher_game_idx
+    ON pitch_events (pitcher_id, game_id) INCLUDE (game_date, pitch_type, pitch_velocity);
+
+-- Batted balls by pitch, covering the columns the rollup aggregates
+CREATE INDEX IF NOT EXISTS batted_ball_events_pitch_idx
+    ON batted_ball_events (pitch_id) INCLUDE (exit_velocity, hard_hit_flag, barrel_flag);
+
+-- Plate appearance outcomes by final pitch (the rollup join) and by pitcher and game
+CREATE INDEX IF NOT EXISTS pitcher_batter_outcomes_final_pitch_idx
+    ON pitcher_batter_outcomes (final_pitch_id) INCLUDE (result);
+CREATE INDEX IF NOT EXISTS pitcher_batter_outcomes_pitcher_game_idx
+    ON pitcher_batter_outcomes (pitcher_id, game_id);
+
+-- Pitches are loaded in time order, so per-block-range minimums and maximums
+-- of event_timestamp and game_date are tight. These BRIN indexes take a few
+-- pages. They let the rollup's watermark scan and date-range filters skip most
+-- of a season partition.
+CREATE INDEX IF NOT EXISTS pitch_events_event_timestamp_brin
+    ON pitch_events USING brin (event_timestamp);
+CREATE INDEX IF NOT EXISTS pitch_events_game_date_brin
+    ON pitch_events USING brin (game_date);
+
+ANALYZE batted_ball_events;
+ANALYZE pitcher_batter_outcomes;
@@ -0,0 +1,25 @@
+-- Record the CSV data row each ingest batch starts at
+--
+-- Resuming by batch number only lines batches up with the right rows when the
+-- chunk size stays the same. With each batch's first row recorded, a load
+-- resumes after the last committed row whatever chunk size it runs with.
+-- Existing batches of a source were committed in order from the first data
+-- row, so each one starts after the rows loaded and rejected before it.
+
+ALTER TABLE ingest_batches ADD COLUMN IF NOT EXISTS start_row BIGINT;
+
+UPDATE ingest_batches b
+SET start_row = offsets.start_row
+FROM (
+    SELECT source_name, batch_no,
+           COALESCE(SUM(rows_loaded + rows_rejected) OVER (
+               PARTITION BY source_name ORDER BY batch_no
+               ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+           ), 0) AS start_row
+    FROM ingest_batches
+) offsets
+WHERE b.source_name = offsets.source_name
+  AND b.batch_no = offsets.batch_no
+  AND b.start_row IS NULL;
+
+ALTER TABLE ingest_batches ALTER COLUMN start_row SET NOT NULL;
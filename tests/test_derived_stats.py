@@ -0,0 +1,52 @@
+"""
+Derived pitcher statistics on rows with missing or empty inputs
+
+Usage:
+    python -m pytest tests/test_derived_stats.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_processing import compact_dtypes
+from utils.derived_stats import PITCH_COLUMNS, derive_stats
+
+def pitch_mix(rows):
+    """
+    Pitch mix frame with one row per list of PITCH_COLUMNS usage rates
+    """
+    return pd.DataFrame(rows, columns=PITCH_COLUMNS, dtype=np.float64)
+
+@pytest.mark.parametrize('compact', [False, True], ids=['float64', 'float32'])
+def test_primary_pitch_falls_back_to_unknown(compact):
+    nan = np.nan
+    df = pitch_mix([
+        [nan] * 7,
+        [0.0] * 7,
+        [nan, 0.0, nan, 0.0, nan, 0.0, nan],
+        [nan, nan, nan, nan, nan, 30.5, nan],
+        [40.0, 20.0, nan, 0.0, 10.0, 25.0, 5.0],
+    ])
+    if compact:
+        df = compact_dtypes(df)
+    derive_stats(df)
+    assert df['primary_pitch'].tolist() == ['Unknown', 'Unknown', 'Unknown', 'Slider', 'Four-Seam']
+
+@pytest.mark.parametrize('dtype', [np.int16, np.float32])
+def test_k_rate_is_missing_without_at_bats(dtype):
+    df = pd.DataFrame({
+        'strikeouts': np.array([0, 3, 2, 7], dtype=dtype),
+        'ab': np.array([0, 0, 10, 30], dtype=dtype),
+    })
+    derive_stats(df)
+    np.testing.assert_array_equal(df['k_rate'].to_numpy(), [np.nan, np.nan, 20.0, 23.3])
+
+def test_k_rate_with_missing_counts():
+    df = pd.DataFrame({'strikeouts': [np.nan, 4.0], 'ab': [12.0, np.nan]})
+    derive_stats(df)
+    assert df['k_rate'].isna().all()
+
+def test_stats_without_their_inputs_are_skipped():
+    df = pd.DataFrame({'strikeouts': [1, 2]})
+    derive_stats(df)
+    assert df.columns.tolist() == ['strikeouts']
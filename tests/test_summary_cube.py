@@ -0,0 +1,85 @@
+"""
+SummaryCube means against a scan of the whole frame
+
+The cube answers whole pitch-count buckets from precomputed sums and scans
+the rows of cut-through buckets, so random filters, including fractional
+slider bounds that fall inside a bucket, must give the same means as
+filtering every row.
+
+Usage:
+    python -m pytest tests/test_summary_cube.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_processing import compact_dtypes
+from utils.filter_index import FilterIndex
+from utils.summary_cube import CUBE_COLUMNS, SummaryCube
+
+TEAMS = ['Yankees', 'Red Sox', 'Dodgers', 'Giants', 'Cubs']
+
+@pytest.fixture(scope='module')
+def pitchers():
+    """
+    Pitchers with compact dtypes, missing teams, pitch counts and stat values
+    """
+    rng = np.random.default_rng(7)
+    n = 3_000
+    df = pd.DataFrame({
+        'player_id': np.arange(n),
+        'team': rng.choice(TEAMS + [None], n, p=[0.19] * 5 + [0.05]),
+        'pitches': rng.integers(1, 400, n).astype(np.float64),
+    })
+    df.loc[rng.random(n) < 0.02, 'pitches'] = np.nan
+    for col in CUBE_COLUMNS:
+        values = rng.uniform(0, 60, n).round(1)
+        values[rng.random(n) < 0.05] = np.nan
+        df[col] = values
+    return compact_dtypes(df)
+
+def scan_means(df, columns, teams, pitches_range):
+    """
+    Means over the matching rows, filtering the whole frame
+    """
+    mask = df['pitches'].between(*pitches_range).to_numpy(dtype=bool, na_value=False)
+    if teams:
+        mask &= df['team'].isin(teams).to_numpy()
+    return df.loc[mask, columns].astype(np.float64).mean().tolist()
+
+def random_filters(rng, low, high, count):
+    """
+    Team selections and pitch-count ranges like the slider and dropdown produce, many with fractional ends
+    """
+    for _ in range(count):
+        teams = list(rng.choice(TEAMS + ['Mets'], rng.integers(0, 4), replace=False))
+        bounds = np.sort(rng.uniform(low - 10, high + 10, 2))
+        if rng.random() < 0.3:
+            bounds = np.round(bounds)
+        yield teams, (float(bounds[0]), float(bounds[1]))
+
+@pytest.mark.parametrize('shared', [False, True], ids=['built', 'from_arrays'])
+def test_means_match_full_scan(pitchers, shared):
+    index = FilterIndex(pitchers)
+    cube = SummaryCube(pitchers, index)
+    if shared:
+        meta, arrays = cube.to_arrays()
+        cube = SummaryCube.from_arrays(pitchers, index, meta, arrays)
+    assert cube.enabled
+
+    rng = np.random.default_rng(11)
+    columns = list(CUBE_COLUMNS)
+    for teams, pitches_range in random_filters(rng, 1, 400, 300):
+        rng.shuffle(columns)
+        expected = scan_means(pitchers, columns, teams, pitches_range)
+        actual = cube.means(columns, teams, pitches_range)
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, equal_nan=True,
+                                   err_msg=f'teams={teams} pitches_range={pitches_range}')
+
+def test_range_inside_one_bucket(pitchers):
+    cube = SummaryCube(pitchers, FilterIndex(pitchers))
+    # Both ends cut through the same bucket, and the range holds a single pitch count
+    for pitches_range in [(101.5, 103.5), (102.0, 102.0), (102.2, 102.8)]:
+        expected = scan_means(pitchers, CUBE_COLUMNS, [], pitches_range)
+        np.testing.assert_allclose(cube.means(CUBE_COLUMNS, [], pitches_range), expected,
+                                   rtol=1e-9, equal_nan=True)
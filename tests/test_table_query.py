@@ -0,0 +1,141 @@
+"""
+DataTable filter_query parsing and evaluation for the server-side pitcher table
+
+Covers every operator the table accepts, in symbol and word form, and
+malformed clauses, which are skipped rather than failing the request.
+
+Usage:
+    python -m pytest tests/test_table_query.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.table_query import filter_mask, parse_filter_query, query_table, split_filter_part
+
+@pytest.fixture(params=['object', 'string'])
+def pitchers(request):
+    """
+    Small pitcher table; names are Python strings or, as in a shared snapshot, a string column
+    """
+    df = pd.DataFrame({
+        'name': ['Gerrit Cole', 'Shohei Ohtani', None, 'Pitcher 12', "Logan O'Hoppe"],
+        'team': pd.Categorical(['Yankees', 'Dodgers', 'Yankees', 'Cubs', 'Angels']),
+        'pitches': np.array([95, 60, 110, 12, 75], dtype=np.int16),
+        'max_velo': np.array([99.1, 101.2, 95.3, 92.2, np.nan], dtype=np.float32),
+    })
+    if request.param == 'string':
+        df['name'] = df['name'].astype(pd.StringDtype('pyarrow'))
+    return df
+
+def matching(df, filter_query):
+    """
+    Row positions matching a filter_query, or None when it filters nothing
+    """
+    mask = filter_mask(df, filter_query)
+    return None if mask is None else np.flatnonzero(mask).tolist()
+
+@pytest.mark.parametrize('clause, expected', [
+    ('{pitches} >= 75', ('pitches', 'ge', 75.0)),
+    ('{pitches} ge 75', ('pitches', 'ge', 75.0)),
+    ('{pitches} <= 75', ('pitches', 'le', 75.0)),
+    ('{pitches} le 75', ('pitches', 'le', 75.0)),
+    ('{pitches} < 75', ('pitches', 'lt', 75.0)),
+    ('{pitches} lt 75', ('pitches', 'lt', 75.0)),
+    ('{pitches} > 75', ('pitches', 'gt', 75.0)),
+    ('{pitches} gt 75', ('pitches', 'gt', 75.0)),
+    ('{pitches} != 60', ('pitches', 'ne', 60.0)),
+    ('{pitches} ne 60', ('pitches', 'ne', 60.0)),
+    ('{team} = Cubs', ('team', 'eq', 'Cubs')),
+    ('{team} eq Cubs', ('team', 'eq', 'Cubs')),
+    ('{name} contains cole', ('name', 'contains', 'cole')),
+    ('{name} datestartswith Gerrit', ('name', 'datestartswith', 'Gerrit')),
+    # Symbols need no surrounding whitespace
+    ('{pitches}>=75', ('pitches', 'ge', 75.0)),
+    ('  {max_velo}   <   95.5  ', ('max_velo', 'lt', 95.5)),
+    # Quoted values keep their spaces and escaped quotes, and stay text
+    ("{name} = 'Gerrit Cole'", ('name', 'eq', 'Gerrit Cole')),
+    ('{name} eq "Logan O\'Hoppe"', ('name', 'eq', "Logan O'Hoppe")),
+    ("{name} = 'O\\'Hoppe'", ('name', 'eq', "O'Hoppe")),
+    ('{pitches} = "60"', ('pitches', 'eq', '60')),
+    # Text operators keep number-like values as typed
+    ('{name} contains 12', ('name', 'contains', '12')),
+    ('{game_date} datestartswith 2024', ('game_date', 'datestartswith', '2024')),
+    # An operator word at the start of a value is part of the value
+    ('{team} eq ne York', ('team', 'eq', 'ne York')),
+    ('{name} contains contains', ('name', 'contains', 'contains')),
+])
+def test_split_filter_part(clause, expected):
+    assert split_filter_part(clause) == expected
+
+@pytest.mark.parametrize('clause', [
+    '',
+    'pitches > 60',
+    '{pitches} 60',
+    '{pitches} equals 60',
+    '{pitches} ge60',
+    '{name} containsx',
+    '{a}{b} = 1',
+    '{} = 1',
+    '{pitches > 60',
+])
+def test_malformed_clauses_do_not_parse(clause):
+    assert split_filter_part(clause) == (None, None, None)
+
+@pytest.mark.parametrize('filter_query, expected', [
+    ('{pitches} >= 75', [0, 2, 4]),
+    ('{pitches} <= 75', [1, 3, 4]),
+    ('{pitches} < 75', [1, 3]),
+    ('{pitches} > 75', [0, 2]),
+    ('{pitches} != 60', [0, 2, 3, 4]),
+    ('{pitches} = 60', [1]),
+    ('{max_velo} > 95.3', [0, 1]),
+    ('{team} = Yankees', [0, 2]),
+    ('{team} ne Yankees', [1, 3, 4]),
+    # Missing names are only != a value
+    ('{name} = "Gerrit Cole"', [0]),
+    ('{name} != "Gerrit Cole"', [1, 2, 3, 4]),
+    ('{name} contains OHTANI', [1]),
+    ('{name} contains 12', [3]),
+    ('{name} datestartswith Logan', [4]),
+    ('{team} = Yankees && {pitches} > 100', [2]),
+])
+def test_filter_mask(pitchers, filter_query, expected):
+    assert matching(pitchers, filter_query) == expected
+
+@pytest.mark.parametrize('filter_query', [
+    # Unparseable clauses, unknown columns, ordered comparisons on text or with text
+    'garbage',
+    '{pitches} >= ',
+    '{velocity} > 90',
+    '{name} > "M"',
+    '{pitches} > abc',
+    '{pitches} > 60 &&',
+])
+def test_invalid_clauses_are_ignored(pitchers, filter_query):
+    assert matching(pitchers, filter_query) == list(range(len(pitchers)))
+
+def test_empty_query_filters_nothing(pitchers):
+    assert matching(pitchers, '') is None
+    assert matching(pitchers, None) is None
+
+def test_malformed_clauses_are_skipped_among_valid_ones():
+    assert parse_filter_query('{pitches} > 60 && garbage && {team} = Cubs') == [
+        ('pitches', 'gt', 60.0), ('team', 'eq', 'Cubs')
+    ]
+
+def test_equality_between_text_and_numbers_matches_nothing(pitchers):
+    assert matching(pitchers, '{pitches} = "60"') == []
+    assert matching(pitchers, '{name} = 12') == []
+
+def test_query_table_filters_sorts_and_pages(pitchers):
+    records, page_count = query_table(
+        pitchers, ['name', 'pitches', 'max_velo'], page_current=0, page_size=2,
+        sort_by=[{'column_id': 'pitches', 'direction': 'desc'}],
+        filter_query='{name} != "Gerrit Cole"'
+    )
+    assert page_count == 2
+    # Missing names are None and float32 values are at their source scale; NaN is sent as null
+    assert records[0] == {'name': None, 'pitches': 110, 'max_velo': 95.3}
+    assert records[1]['name'] == "Logan O'Hoppe" and records[1]['pitches'] == 75
+    assert np.isnan(records[1]['max_velo'])
@@ -0,0 +1,106 @@
+"""
+Run slow dashboard callbacks as background jobs outside the web workers
+
+Jobs go through Dash's DiskcacheManager: the web worker forks a process per
+job and returns at once, and the browser polls for progress and the result,
+which the job writes to a diskcache directory every gunicorn worker can read.
+A request that supersedes a running job of the same callback, or a click on
+its cancel button, terminates that job's process. Results are cached on disk
+by the callback's inputs and the values of the cache_by functions. Metrics a
+job records are spooled to the metrics subdirectory and reported by the workers.
+"""
+import functools
+import os
+import tempfile
+
+from dash import DiskcacheManager
+
+from utils.metrics import REGISTRY
+
+# Added to a job process's niceness so interactive callbacks keep priority on the CPU
+JOB_NICENESS = 10
+
+class JobManager(DiskcacheManager):
+    """
+    DiskcacheManager that does not recompute results it already has cached
+
+    Dash starts a job for every request and only looks in the cache when the
+    browser polls for the result. For a cached result the job started here
+    exits at once, so the poll is answered from the cache without redoing the work.
+    """
+    def call_job_fn(self, key, job_fn, args, context):
+        if self.cache_by and self.result_ready(key):
+            job_fn = _finished_job
+        return super().call_job_fn(key, job_fn, args, context)
+
+def _finished_job(result_key, progress_key, user_callback_args, context):
+    pass
+
+def default_job_dir():
+    """
+    Job directory: JOB_CACHE_DIR, else dashboard_jobs in the temp directory
+    """
+    return os.environ.get('JOB_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'dashboard_jobs')
+
+def job_metrics_dir(cache_dir=None):
+    """
+    Directory job processes spool their metrics to, inside the job directory
+    """
+    return os.path.join(cache_dir or default_job_dir(), 'metrics')
+
+def create_job_manager(cache_dir=None, cache_by=None, expire=600):
+    """
+    Background callback manager storing job progress and results on disk
+
+    Args:
+        cache_dir: Directory shared by all workers of the server
+        cache_by: Zero-argument functions whose values are part of every result's cache key
+        expire: Seconds a result stays cached after it was last read
+
+    Returns:
+        JobManager
+    """
+    import diskcache
+    return JobManager(diskcache.Cache(cache_dir or default_job_dir()), cache_by=cache_by, expire=expire)
+
+def prepare_job_process(engines=()):
+    """
+    Set up a freshly forked job process before it does any work
+
+    Lowers the process's CPU priority, drops the database connections
+    inherited from the web worker, which must not be shared across fork(), and
+    clears the metrics copied from the worker so only the job's own are reported.
+
+    Args:
+        engines: SQLAlchemy engines the job may use
+    """
+    try:
+        os.nice(JOB_NICENESS)
+    except OSError:
+        pass
+    for engine in engines:
+        if engine is not None:
+            engine.dispose(close=False)
+    REGISTRY.reset()
+
+def job_callback(engines=()):
+    """
+    Decorator for a background callback: prepares the job process, then spools
+    the metrics recorded while it ran for the web workers to report
+
+    Args:
+        engines: SQLAlchemy engines the job may use
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            prepare_job_process(engines)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                try:
+                    REGISTRY.spool(job_metrics_dir())
+                except OSError as e:
+                    print(f"Failed to spool job metrics: {e}")
+        return wrapper
+    return decorator
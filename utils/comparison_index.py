@@ -0,0 +1,174 @@
+import bisect
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.packed_strings import PackedStrings
+
+# Metrics on the comparison radar; for those in LOWER_IS_BETTER a smaller value scores higher
+RADAR_METRICS = ['max_velo', 'strikeouts', 'hard_hit_pct', 'barrel_pct', 'avg']
+RADAR_NAMES = ['Max Velocity', 'Strikeouts', 'Hard-Hit Rate', 'Barrel Rate', 'Batting Avg']
+LOWER_IS_BETTER = {'avg'}
+
+class ComparisonIndex:
+    """
+    Per-snapshot lookups for pitcher comparison views
+
+    Holds the sorted player ids with their rows, the min and max of every
+    radar metric and each metric's sorted values, so the scores of N pitchers
+    cost N binary searches per metric instead of a pass over every pitcher.
+    A name search index is built the first time someone searches, or up front
+    by to_arrays.
+
+    Args:
+        df: DataFrame of the snapshot
+        filter_index: The snapshot's FilterIndex, whose sorted range columns are reused
+        metrics: Metrics to score
+    """
+    def __init__(self, df, filter_index=None, metrics=RADAR_METRICS):
+        self.df = df
+        self.metrics = [metric for metric in metrics if metric in df.columns]
+        self.enabled = 'player_id' in df.columns
+
+        ids = df['player_id'].to_numpy() if self.enabled else np.empty(0)
+        # Duplicate ids keep their first row
+        first = ~pd.Index(ids).duplicated()
+        self.positions = np.flatnonzero(first)
+        order = np.argsort(ids[first], kind='stable')
+        self.sorted_ids = ids[first][order]
+        self.id_rows = self.positions[order]
+
+        self.sorted_values = {}
+        self.min = {}
+        self.max = {}
+        for metric in self.metrics:
+            if filter_index is not None and metric in filter_index.ranges:
+                values = filter_index.ranges[metric][0]
+                if values.dtype.kind != 'f':
+                    values = values.astype(np.float64)
+            else:
+                values = df[metric].to_numpy(dtype=np.float64, na_value=np.nan)
+                values = np.sort(values[~np.isnan(values)])
+            self.sorted_values[metric] = values
+            self.min[metric] = float(values[0]) if len(values) else np.nan
+            self.max[metric] = float(values[-1]) if len(values) else np.nan
+
+        self._names = None
+        self._names_lock = threading.Lock()
+
+    def to_arrays(self):
+        """
+        The index as a JSON-serializable description plus the arrays it is made of,
+        name search index included
+
+        Returns:
+            Tuple of (meta, arrays) for from_arrays
+        """
+        meta = {'metrics': self.metrics, 'enabled': self.enabled, 'min': self.min, 'max': self.max,
+                'names': False}
+        arrays = {'positions': self.positions, 'sorted_ids': self.sorted_ids, 'id_rows': self.id_rows}
+        for i, metric in enumerate(self.metrics):
+            arrays[f'metric{i}_sorted'] = self.sorted_values[metric]
+        if self.enabled and 'name' in self.df.columns:
+            keys, rows = self._name_index()
+            meta['names'] = True
+            arrays.update(name_offsets=keys.offsets, name_data=keys.data, name_rows=rows)
+        return meta, arrays
+
+    @classmethod
+    def from_arrays(cls, df, meta, arrays):
+        """
+        Rebuild an index from to_arrays output, e.g. memory-mapped arrays, without copying them
+        """
+        index = cls.__new__(cls)
+        index.df = df
+        index.metrics = meta['metrics']
+        index.enabled = meta['enabled']
+        index.positions = arrays['positions']
+        index.sorted_ids = arrays['sorted_ids']
+        index.id_rows = arrays['id_rows']
+        index.sorted_values = {metric: arrays[f'metric{i}_sorted'] for i, metric in enumerate(index.metrics)}
+        index.min = meta['min']
+        index.max = meta['max']
+        index._names = None
+        if meta['names']:
+            index._names = (PackedStrings(arrays['name_offsets'], arrays['name_data']), arrays['name_rows'])
+        index._names_lock = threading.Lock()
+        return index
+
+    def rows(self, player_ids):
+        """
+        Row positions of the given players, in order, skipping unknown ids
+        """
+        keys = np.asarray(player_ids)
+        if not self.enabled or not len(keys) or keys.dtype.kind not in 'iuf':
+            return np.empty(0, dtype=np.intp)
+        found = np.minimum(np.searchsorted(self.sorted_ids, keys), max(len(self.sorted_ids) - 1, 0))
+        known = self.sorted_ids[found] == keys if len(self.sorted_ids) else np.zeros(len(keys), dtype=bool)
+        return self.id_rows[found[known]]
+
+    def scores(self, rows):
+        """
+        Min-max scores and percentile ranks of every metric for the given rows
+
+        Both are on a 0-1 scale where higher is better, so metrics in
+        LOWER_IS_BETTER are inverted. Percentiles are mid-ranks: the share of
+        pitchers below the value plus half of those tied with it.
+
+        Returns:
+            Tuple of (values, scaled, percentiles), each a len(rows) x len(metrics) array
+        """
+        # Take the rows before converting so the cost does not grow with the snapshot
+        values = np.column_stack([
+            self.df[metric].to_numpy()[rows].astype(np.float64) for metric in self.metrics
+        ]) if len(self.metrics) else np.empty((len(rows), 0))
+        scaled = np.empty_like(values)
+        percentiles = np.empty_like(values)
+        for j, metric in enumerate(self.metrics):
+            spread = self.max[metric] - self.min[metric]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scaled[:, j] = (values[:, j] - self.min[metric]) / spread if spread else 0.5
+            sorted_values = self.sorted_values[metric]
+            # Keys in the sorted array's dtype, or numpy would convert the whole array on every search
+            keys = values[:, j].astype(sorted_values.dtype)
+            below = np.searchsorted(sorted_values, keys, side='left')
+            tied = np.searchsorted(sorted_values, keys, side='right') - below
+            percentiles[:, j] = (below + tied / 2) / max(len(sorted_values), 1)
+            percentiles[np.isnan(values[:, j]), j] = np.nan
+            if metric in LOWER_IS_BETTER:
+                scaled[:, j] = 1 - scaled[:, j]
+                percentiles[:, j] = 1 - percentiles[:, j]
+        return values, scaled, percentiles
+
+    def search(self, text, limit=20):
+        """
+        Players whose full name or last name starts with text, case-insensitive
+
+        Returns:
+            List of (player_id, name) tuples, at most limit long
+        """
+        text = (text or '').strip().lower()
+        if not text or not self.enabled or 'name' not in self.df.columns:
+            return []
+        keys, rows = self._name_index()
+        start = bisect.bisect_left(keys, text)
+        stop = bisect.bisect_left(keys, text + '￿', lo=start)
+        matches = pd.unique(rows[start:stop])[:limit]
+        names = self.df['name'].iloc[matches]
+        ids = self.df['player_id'].to_numpy()
+        return [(ids[row].item(), str(name)) for row, name in zip(matches, names)]
+
+    def _name_index(self):
+        """
+        Sorted lowercase full and last names with the row each came from, built once on first use
+        """
+        with self._names_lock:
+            if self._names is None:
+                names = self.df['name'].iloc[self.positions].astype(str).str.lower()
+                last = names.str.rsplit(' ', n=1).str[-1]
+                keys = np.concatenate([names.to_numpy(dtype=object), last.to_numpy(dtype=object)])
+                rows = np.concatenate([self.positions, self.positions])
+                order = np.argsort(keys, kind='stable')
+                self._names = (PackedStrings.from_strings(keys[order]), rows[order])
+            return self._names
@@ -0,0 +1,79 @@
+import numpy as np
+
+# Pitch mix columns and the display names they map to
+PITCH_COLUMNS = ['ff_pct', 'si_pct', 'fc_pct', 'fs_pct', 'ch_pct', 'sl_pct', 'cu_pct']
+PITCH_NAMES = ['Four-Seam', 'Sinker', 'Cutter', 'Split-Finger', 'Changeup', 'Slider', 'Curveball']
+
+# Batting result columns and their display names
+BATTING_COLUMNS = ['singles', 'doubles', 'triples', 'home_runs', 'strikeouts']
+BATTING_NAMES = ['Singles', 'Doubles', 'Triples', 'Home Runs', 'Strikeouts']
+
+# Registry of derived statistics, evaluated in registration order
+DERIVED_STATS = []
+
+def derived_stat(name, requires):
+    """
+    Register a derived statistic
+
+    The decorated function receives a dict mapping each required column to a
+    NumPy array and must return a whole-column array of the same length.
+
+    Args:
+        name: Name of the column to create
+        requires: Columns that must be present for the statistic to be computed
+    """
+    def register(func):
+        DERIVED_STATS.append((name, tuple(requires), func))
+        return func
+    return register
+
+@derived_stat('k_rate', requires=['strikeouts', 'ab'])
+def _k_rate(cols):
+    # Undefined without at-bats: missing rather than infinite, so it never skews an average
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(cols['ab'] > 0, np.round(cols['strikeouts'] / cols['ab'] * 100, 1), np.nan)
+
+@derived_stat('total_bases', requires=['singles', 'doubles', 'triples', 'home_runs'])
+def _total_bases(cols):
+    return cols['singles'] + 2 * cols['doubles'] + 3 * cols['triples'] + 4 * cols['home_runs']
+
+@derived_stat('primary_pitch', requires=PITCH_COLUMNS)
+def _primary_pitch(cols):
+    mix = np.column_stack([cols[col] for col in PITCH_COLUMNS])
+    # Missing usage never wins; rows with no positive usage fall back to 'Unknown'
+    mix = np.where(np.isnan(mix), -np.inf, mix)
+    best = mix.argmax(axis=1)
+    best[~(mix > 0).any(axis=1)] = len(PITCH_NAMES)
+    return np.array(PITCH_NAMES + ['Unknown'], dtype=object)[best]
+
+def derive_stats(df):
+    """
+    Add every registered derived statistic to a pitcher DataFrame in place
+
+    Statistics whose required columns are missing are skipped, and a statistic
+    may depend on columns derived before it.
+
+    Args:
+        df: Pitcher DataFrame with numeric stat columns
+
+    Returns:
+        The same DataFrame with derived columns added
+    """
+    cols = {}
+    for name, requires, func in DERIVED_STATS:
+        if not all(col in df.columns for col in requires):
+            continue
+        for col in requires:
+            if col not in cols:
+                cols[col] = _column_array(df[col])
+        df[name] = func(cols)
+        cols[name] = _column_array(df[name])
+    return df
+
+def _column_array(series):
+    """
+    Get a column as a NumPy array, keeping plain integers and strings as-is
+    """
+    if series.dtype.kind in 'iuO':
+        return series.to_numpy()
+    return series.to_numpy(dtype=np.float64, na_value=np.nan)
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+# Columns filtered by membership (dropdowns) and by value range (sliders, date pickers)
+SET_COLUMNS = ['team']
+RANGE_COLUMNS = ['pitches', 'max_velo', 'hard_hit_pct']
+
+class FilterIndex:
+    """
+    Row-position indexes over a snapshot's DataFrame, built once per snapshot
+
+    Membership columns map each value to the sorted row positions holding it;
+    range columns keep their values sorted alongside the matching row
+    positions, so a range is two binary searches. A filter is answered as an
+    intersection of position arrays and never touches the full frame.
+
+    Args:
+        df: DataFrame to index
+        set_columns: Columns filtered by membership, e.g. team
+        range_columns: Numeric or datetime columns filtered by [low, high] ranges
+    """
+    def __init__(self, df, set_columns=SET_COLUMNS, range_columns=RANGE_COLUMNS):
+        self.rows = len(df)
+        self.sets = {}
+        self.ranges = {}
+        for col in set_columns:
+            if col in df.columns:
+                self.sets[col] = _value_positions(df[col])
+        for col in range_columns:
+            if col in df.columns:
+                self.ranges[col] = _sorted_positions(df[col])
+
+    def to_arrays(self):
+        """
+        The index as a JSON-serializable description plus the arrays it is made of
+
+        Returns:
+            Tuple of (meta, arrays) for from_arrays
+        """
+        meta = {'rows': self.rows, 'sets': {}, 'ranges': []}
+        arrays = {}
+        for i, (col, index) in enumerate(self.sets.items()):
+            parts = list(index.values())
+            meta['sets'][col] = [value.item() if isinstance(value, np.generic) else value for value in index]
+            arrays[f'set{i}_positions'] = np.concatenate(parts) if parts else np.empty(0, dtype=np.intp)
+            arrays[f'set{i}_bounds'] = np.cumsum([0] + [len(part) for part in parts])
+        for i, (col, (sorted_values, order)) in enumerate(self.ranges.items()):
+            meta['ranges'].append(col)
+            arrays[f'range{i}_values'] = sorted_values
+            arrays[f'range{i}_order'] = order
+        return meta, arrays
+
+    @classmethod
+    def from_arrays(cls, meta, arrays):
+        """
+        Rebuild an index from to_arrays output, e.g. memory-mapped arrays, without copying them
+        """
+        index = cls.__new__(cls)
+        index.rows = meta['rows']
+        index.sets = {}
+        for i, (col, values) in enumerate(meta['sets'].items()):
+            positions, bounds = arrays[f'set{i}_positions'], arrays[f'set{i}_bounds']
+            index.sets[col] = {value: positions[bounds[j]:bounds[j + 1]] for j, value in enumerate(values)}
+        index.ranges = {col: (arrays[f'range{i}_values'], arrays[f'range{i}_order'])
+                        for i, col in enumerate(meta['ranges'])}
+        return index
+
+    def select(self, isin=None, ranges=None):
+        """
+        Find the rows matching every given condition
+
+        Args:
+            isin: Dict of column -> allowed values; empty or None values mean no filter
+            ranges: Dict of column -> (low, high), inclusive; either bound may be None
+
+        Returns:
+            Sorted array of matching row positions
+        """
+        candidates = []
+        for col, values in (isin or {}).items():
+            if values:
+                candidates.append(self._positions_in(col, values))
+        for col, bounds in (ranges or {}).items():
+            if bounds is not None:
+                candidates.append(self._positions_between(col, *bounds))
+
+        if not candidates:
+            return np.arange(self.rows)
+        candidates.sort(key=len)
+        positions = candidates[0]
+        for other in candidates[1:]:
+            if len(positions) == 0:
+                break
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        return positions
+
+    def _positions_in(self, col, values):
+        index = self.sets[col]
+        parts = [index[value] for value in values if value in index]
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(parts)) if len(parts) > 1 else parts[0]
+
+    def _positions_between(self, col, low, high):
+        sorted_values, order = self.ranges[col]
+        start = 0 if low is None else np.searchsorted(sorted_values, low, side='left')
+        stop = len(sorted_values) if high is None else np.searchsorted(sorted_values, high, side='right')
+        return np.sort(order[start:stop])
+
+def _value_positions(series):
+    """
+    Map each distinct value to the sorted positions of the rows holding it
+    """
+    codes, uniques = pd.factorize(series)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)}
+
+def _sorted_positions(series):
+    """
+    Sort a column's non-missing values, keeping the row position of each
+    """
+    values = series.to_numpy()
+    present = np.flatnonzero(~pd.isna(values))
+    order = present[np.argsort(values[present], kind='stable')]
+    return values[order], order
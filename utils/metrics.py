@@ -0,0 +1,447 @@
+"""
+Process metrics in the Prometheus text exposition format
+
+Counters, gauges and histograms live in a module-level registry. Callbacks are
+timed as a whole and phase by phase; the Flask hooks installed by
+instrument_server add request duration, serialization time and response size
+per callback and serve everything at /metrics.
+
+Each gunicorn worker keeps its own registry. When a shared directory is
+configured, workers periodically write their counters and histograms there and
+/metrics sums them, so a scrape sees the whole server no matter which worker
+answers it. Short-lived processes such as background jobs leave what they
+recorded in a spool directory instead, and a worker adds it to its own registry.
+"""
+import cProfile
+import functools
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6, 1e7)
+ROW_BUCKETS = (10, 100, 1e3, 1e4, 1e5, 1e6, 1e7)
+
+class Metric:
+    """
+    Base class: a named metric with a fixed label set and one value per label combination
+    """
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(label, '')) for label in self.labels)
+
+    def state(self):
+        """
+        Current values as a list of [label values, value] pairs
+        """
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def add(self, state):
+        """
+        Add another process's state to this metric's values
+        """
+        with self._lock:
+            for key, value in state:
+                key = tuple(key)
+                self._values[key] = self._combine(self._values[key], value) if key in self._values else value
+
+    def merge(self, states):
+        """
+        Combine the states of several workers into one {label values: value} dict
+        """
+        merged = {}
+        for state in states:
+            for key, value in state:
+                key = tuple(key)
+                merged[key] = self._combine(merged[key], value) if key in merged else value
+        return merged
+
+    def _combine(self, a, b):
+        return a + b
+
+    def _label_text(self, key, extra=None):
+        pairs = list(zip(self.labels, key)) + ([extra] if extra else [])
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    def render(self, values):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        for key, value in sorted(values.items()):
+            lines.append(f'{self.name}{self._label_text(key)} {_number(value)}')
+        return lines
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Metric):
+    """
+    Gauge set directly or read from a function at scrape time
+
+    Values from several workers are merged with combine (e.g. a sum for
+    per-worker totals); with combine=None only the scraped worker's own value is
+    reported, for levels such as snapshot age that every worker measures itself.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, help, labels=(), combine=None):
+        super().__init__(name, help, labels)
+        self._function = None
+        self._combine_values = combine
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function):
+        """
+        Read the (unlabelled) value from function whenever the gauge is collected
+        """
+        self._function = function
+
+    def state(self):
+        if self._function is not None:
+            try:
+                self.set(self._function())
+            except Exception as e:
+                print(f"Failed to collect gauge {self.name}: {e}")
+        return super().state()
+
+    def merge(self, states):
+        if self._combine_values is None:
+            return {tuple(key): value for key, value in next(iter(states), [])}
+        return super().merge(states)
+
+    def _combine(self, a, b):
+        return self._combine_values(a, b)
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observe the wall time of the with-block
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def state(self):
+        with self._lock:
+            return [[list(key), [list(counts), total, n]] for key, (counts, total, n) in self._values.items()]
+
+    def _combine(self, a, b):
+        return [[x + y for x, y in zip(a[0], b[0])], a[1] + b[1], a[2] + b[2]]
+
+    def render(self, values):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        for key, (counts, total, n) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{self._label_text(key, ("le", _number(bound)))} {cumulative}')
+            lines.append(f'{self.name}_bucket{self._label_text(key, ("le", "+Inf"))} {n}')
+            lines.append(f'{self.name}_sum{self._label_text(key)} {_number(total)}')
+            lines.append(f'{self.name}_count{self._label_text(key)} {n}')
+        return lines
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Registry:
+    """
+    Collection of metrics, optionally merged with other workers through a shared directory
+    """
+    def __init__(self):
+        self.metrics = []
+        self.shared_dir = None
+        self.spool_dir = None
+        self._writer = None
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def state(self):
+        return {metric.name: metric.state() for metric in self.metrics}
+
+    def share(self, shared_dir, flush_interval=5.0):
+        """
+        Start writing this worker's state to shared_dir so any worker can report the total
+        """
+        os.makedirs(shared_dir, exist_ok=True)
+        self.shared_dir = shared_dir
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._flush_loop, args=(flush_interval,),
+                                            name='metrics-writer', daemon=True)
+            self._writer.start()
+
+    def reset(self):
+        """
+        Drop every recorded value, so a freshly forked process reports only its own work
+        """
+        for metric in self.metrics:
+            # A lock held by another thread at fork time would never be released here
+            metric._lock = threading.Lock()
+            metric._values = {}
+
+    def spool(self, spool_dir):
+        """
+        Write this process's counters and histograms to spool_dir for a worker to collect
+        """
+        os.makedirs(spool_dir, exist_ok=True)
+        state = {metric.name: metric.state() for metric in self.metrics if not isinstance(metric, Gauge)}
+        fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=spool_dir)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, tmp_path[:-len('.tmp')] + '.json')
+
+    def collect(self, spool_dir):
+        """
+        Also report what short-lived processes leave in spool_dir, collected on every flush and scrape
+        """
+        os.makedirs(spool_dir, exist_ok=True)
+        self.spool_dir = spool_dir
+
+    def _collect_spool(self):
+        if self.spool_dir is None:
+            return
+        for path in glob.glob(os.path.join(self.spool_dir, '.*.json')):
+            # Renaming claims the file, so exactly one worker adds it
+            claimed = f'{path}.{os.getpid()}'
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+            try:
+                with open(claimed) as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = {}
+            finally:
+                os.unlink(claimed)
+            for metric in self.metrics:
+                if not isinstance(metric, Gauge):
+                    metric.add(state.get(metric.name, []))
+
+    def flush(self):
+        """
+        Atomically write this worker's current state to the shared directory
+        """
+        self._collect_spool()
+        path = os.path.join(self.shared_dir, f'{os.getpid()}.json')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state(), f)
+        os.replace(tmp_path, path)
+
+    def _flush_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Failed to write metrics: {e}")
+
+    def _worker_states(self):
+        """
+        State of this worker plus the last state written by every other worker
+        """
+        states = [self.state()]
+        if self.shared_dir is None:
+            return states
+        own = os.path.join(self.shared_dir, f'{os.getpid()}.json')
+        # Files of exited workers are kept so counters never go backwards
+        for path in glob.glob(os.path.join(self.shared_dir, '*.json')):
+            if path == own:
+                continue
+            try:
+                with open(path) as f:
+                    states.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return states
+
+    def render(self):
+        """
+        All metrics in the Prometheus text exposition format
+        """
+        self._collect_spool()
+        states = self._worker_states()
+        lines = []
+        for metric in self.metrics:
+            values = metric.merge(state.get(metric.name, []) for state in states)
+            lines.extend(metric.render(values))
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+CALLBACK_SECONDS = REGISTRY.register(Histogram(
+    'dashboard_callback_seconds', 'Time spent in a Dash callback function', ['callback']))
+PHASE_SECONDS = REGISTRY.register(Histogram(
+    'dashboard_callback_phase_seconds', 'Time spent in one phase of a Dash callback', ['callback', 'phase']))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'dashboard_request_seconds', 'Wall time of a callback HTTP request, including serialization', ['callback']))
+RESPONSE_BYTES = REGISTRY.register(Histogram(
+    'dashboard_response_bytes', 'Size of callback response payloads', ['callback'], buckets=SIZE_BUCKETS))
+REQUEST_ERRORS = REGISTRY.register(Counter(
+    'dashboard_request_errors_total', 'Callback requests answered with a 5xx status', ['callback']))
+DB_QUERY_SECONDS = REGISTRY.register(Histogram(
+    'dashboard_db_query_seconds', 'Duration of database queries', ['query']))
+DB_QUERY_ROWS = REGISTRY.register(Histogram(
+    'dashboard_db_query_rows', 'Rows returned by database queries', ['query'], buckets=ROW_BUCKETS))
+SNAPSHOT_AGE = REGISTRY.register(Gauge(
+    'dashboard_snapshot_age_seconds', 'Seconds since the served data snapshot was loaded'))
+SNAPSHOT_RECORDS = REGISTRY.register(Gauge(
+    'dashboard_snapshot_records', 'Pitcher records in the served data snapshot'))
+CACHE_HITS = REGISTRY.register(Gauge(
+    'dashboard_result_cache_hits', 'Result cache hits since the workers started', combine=lambda a, b: a + b))
+CACHE_MISSES = REGISTRY.register(Gauge(
+    'dashboard_result_cache_misses', 'Result cache misses since the workers started', combine=lambda a, b: a + b))
+
+_context = threading.local()
+
+def instrument_callback(name):
+    """
+    Decorator timing a Dash callback and labelling the phases timed inside it with name
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            _context.callback = name
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                _context.callback_seconds = elapsed
+                CALLBACK_SECONDS.observe(elapsed, callback=name)
+        return wrapper
+    return decorator
+
+@contextmanager
+def phase(name):
+    """
+    Time a phase of the callback running on this thread
+    """
+    with PHASE_SECONDS.time(callback=getattr(_context, 'callback', ''), phase=name):
+        yield
+
+@contextmanager
+def db_query(name):
+    """
+    Time a database query; call the yielded function with the row count once it is known
+    """
+    rows = []
+    with DB_QUERY_SECONDS.time(query=name):
+        yield rows.append
+    if rows:
+        DB_QUERY_ROWS.observe(rows[0], query=name)
+
+def callback_label(payload):
+    """
+    Callback label for a _dash-update-component body: the id of its first output
+    """
+    output = (payload or {}).get('output', '')
+    first = output.strip('.').split('...')[0]
+    return first.rsplit('.', 1)[0]
+
+def instrument_server(server, profile_slow_ms=0, profile_dir=None):
+    """
+    Add callback request metrics, slow-request profiling and a /metrics route to a Flask server
+
+    Args:
+        server: Flask server of the Dash app
+        profile_slow_ms: When positive, profile every callback request and dump
+            the profile of those slower than this many milliseconds
+        profile_dir: Directory for the .prof files (readable with pstats or snakeviz)
+    """
+    from flask import Response, g, request
+
+    if profile_slow_ms > 0:
+        os.makedirs(profile_dir, exist_ok=True)
+
+    def is_callback():
+        return request.path.endswith('/_dash-update-component')
+
+    @server.before_request
+    def start_request():
+        if not is_callback():
+            return
+        _context.callback_seconds = None
+        g.metrics_start = time.perf_counter()
+        if profile_slow_ms > 0:
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @server.after_request
+    def finish_request(response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+
+        label = callback_label(request.get_json(silent=True))
+        REQUEST_SECONDS.observe(elapsed, callback=label)
+        RESPONSE_BYTES.observe(len(response.get_data()), callback=label)
+        if response.status_code >= 500:
+            REQUEST_ERRORS.inc(callback=label)
+        # Whatever the request spent outside the callback function is response serialization
+        if _context.callback_seconds is not None:
+            PHASE_SECONDS.observe(max(elapsed - _context.callback_seconds, 0.0), callback=label, phase='serialize')
+
+        if profiler is not None and elapsed * 1000 >= profile_slow_ms:
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            path = os.path.join(profile_dir, f'{stamp}-{label}-{elapsed * 1000:.0f}ms-{os.getpid()}.prof')
+            profiler.dump_stats(path)
+            print(f"Slow request to {label} took {elapsed * 1000:.0f} ms, profile written to {path}")
+        return response
+
+    @server.route('/metrics')
+    def metrics():
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,72 @@
+"""
+Strings packed into one UTF-8 byte buffer plus offsets
+
+An array of Python str objects can only live in the process that built it.
+Packed, a column of strings is a few flat NumPy arrays that can be saved as
+.npy files and memory-mapped by every worker, and pandas can read it through
+PyArrow without creating a str object per value.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+def pack_strings(values):
+    """
+    Pack strings into Arrow's string layout
+
+    Args:
+        values: Strings, with None or NaN for missing values
+
+    Returns:
+        Tuple of (offsets, data, validity): int32 offsets, one more than there are
+        values; uint8 UTF-8 data; and the little-endian validity bitmap as uint8,
+        or None when no value is missing
+
+    Raises:
+        pyarrow.ArrowCapacityError: if the data exceeds the 2 GiB int32 offsets can address
+    """
+    array = pa.array(values, type=pa.string(), from_pandas=True)
+    validity, offsets, data = array.buffers()
+    offsets = np.frombuffer(offsets, dtype=np.int32, count=len(array) + 1)
+    data = np.frombuffer(data, dtype=np.uint8, count=int(offsets[-1])) if data is not None else np.empty(0, np.uint8)
+    if array.null_count:
+        validity = np.frombuffer(validity, dtype=np.uint8, count=(len(array) + 7) // 8)
+    else:
+        validity = None
+    return offsets, data, validity
+
+def strings_array(offsets, data, validity=None):
+    """
+    pandas string array reading packed strings in place, without copying the buffers
+    """
+    array = pa.StringArray.from_buffers(
+        len(offsets) - 1, pa.py_buffer(offsets), pa.py_buffer(data),
+        pa.py_buffer(validity) if validity is not None else None
+    )
+    return pd.arrays.ArrowStringArray(pa.chunked_array([array], type=pa.string()))
+
+class PackedStrings:
+    """
+    Read-only sequence over packed strings, decoding only the items accessed
+
+    Works with the bisect module, so a sorted PackedStrings is searched in
+    O(log n) decodes.
+
+    Args:
+        offsets: int32 or int64 offsets, one more than there are strings
+        data: uint8 UTF-8 data
+    """
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_strings(cls, strings):
+        offsets, data, _ = pack_strings(strings)
+        return cls(offsets, data)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
@@ -0,0 +1,233 @@
+"""
+Parameterized, column-pruned queries against the pitcher tables
+
+Filters and aggregates are pushed down into PostgreSQL so only the rows and
+columns a view needs leave the database. Every statement uses bound parameters
+(team lists through an expanding IN), so SQLAlchemy compiles each query shape
+once and reuses it from its statement cache.
+"""
+import math
+from operator import ge, gt, le, lt
+
+import pandas as pd
+from sqlalchemy import (
+    Column, Date, Float, Integer, MetaData, Numeric, String, Table,
+    and_, bindparam, cast, exists, false, func, select,
+)
+
+from utils.metrics import db_query
+from utils.table_query import ORDERED_OPERATORS, parse_filter_query
+
+metadata = MetaData()
+
+pitcher_stats = Table(
+    'ads_game_pitcher_stats_f', metadata,
+    Column('player_id', Integer),
+    Column('name', String(100)),
+    Column('team', String(50)),
+    Column('pitches', Integer),
+    Column('max_velo', Numeric(5, 1)),
+    Column('min_velo', Numeric(5, 1)),
+    Column('ff_pct', Numeric(5, 1)),
+    Column('si_pct', Numeric(5, 1)),
+    Column('fc_pct', Numeric(5, 1)),
+    Column('fs_pct', Numeric(5, 1)),
+    Column('ch_pct', Numeric(5, 1)),
+    Column('sl_pct', Numeric(5, 1)),
+    Column('cu_pct', Numeric(5, 1)),
+    Column('max_ev', Numeric(5, 1)),
+    Column('hard_hit', Integer),
+    Column('hard_hit_pct', Numeric(5, 1)),
+    Column('barrels', Integer),
+    Column('barrel_pct', Numeric(5, 1)),
+    Column('ab', Integer),
+    Column('avg', Numeric(5, 3)),
+    Column('hits', Integer),
+    Column('singles', Integer),
+    Column('doubles', Integer),
+    Column('triples', Integer),
+    Column('home_runs', Integer),
+    Column('strikeouts', Integer),
+    Column('bip', Integer),
+)
+
+# pitch_events only has game_date once this migration is applied; the date filter needs it
+GAME_DATE_MIGRATION = '0001_partition_pitch_events_by_game_date'
+
+pitch_events = Table(
+    'pitch_events', metadata,
+    Column('pitch_id', Integer),
+    Column('game_id', Integer),
+    Column('pitcher_id', Integer),
+    Column('game_date', Date),
+)
+
+games = Table(
+    'games', metadata,
+    Column('game_id', Integer),
+    Column('game_date', Date),
+)
+
+# DataTable ordered comparisons as SQLAlchemy column operators
+OPERATOR_FUNCTIONS = {'lt': lt, 'le': le, 'gt': gt, 'ge': ge}
+
+def pitcher_filters(teams=None, pitches_range=None, date_range=None):
+    """
+    Build WHERE clauses for the dashboard filters
+
+    Args:
+        teams: Team names to include; empty or None means all teams
+        pitches_range: (low, high) inclusive pitch-count range
+        date_range: (start, end) inclusive game dates; keeps pitchers who
+            pitched in at least one game in the range
+
+    Returns:
+        List of SQLAlchemy boolean clauses
+    """
+    clauses = []
+    if teams:
+        clauses.append(pitcher_stats.c.team.in_(bindparam('teams', expanding=True, value=list(teams))))
+    if pitches_range is not None:
+        low, high = pitches_range
+        if low is not None:
+            clauses.append(pitcher_stats.c.pitches >= bindparam('pitches_low', value=low))
+        if high is not None:
+            clauses.append(pitcher_stats.c.pitches <= bindparam('pitches_high', value=high))
+    if date_range is not None:
+        start, end = date_range
+        # pitch_events carries the game date as its partition key, so the range
+        # prunes season partitions and is answered from the (pitcher_id, game_id) index
+        game_in_range = [pitch_events.c.pitcher_id == pitcher_stats.c.player_id]
+        if start is not None:
+            game_in_range.append(pitch_events.c.game_date >= bindparam('date_start', value=start))
+        if end is not None:
+            game_in_range.append(pitch_events.c.game_date <= bindparam('date_end', value=end))
+        clauses.append(exists(select(pitch_events.c.pitch_id).where(and_(*game_in_range))))
+    return clauses
+
+def pitcher_rows_query(columns=None, teams=None, pitches_range=None, date_range=None):
+    """
+    SELECT of only the requested columns for the pitchers matching the filters
+
+    DECIMAL columns are cast to double precision so they arrive as floats, not Decimal objects.
+    """
+    selected = [
+        cast(col, Float).label(col.name) if isinstance(col.type, Numeric) else col
+        for col in (pitcher_stats.c[name] for name in columns or pitcher_stats.c.keys())
+    ]
+    return select(*selected).where(*pitcher_filters(teams, pitches_range, date_range))
+
+def table_filter_clauses(filter_query):
+    """
+    Build WHERE clauses for a DataTable filter_query, matching how query_table evaluates it
+
+    Clauses on unknown columns, and ordered comparisons on text columns or
+    with text values, are ignored; equality between a numeric column and a
+    text value, or a text column and a number, matches nothing.
+
+    Returns:
+        List of SQLAlchemy boolean clauses
+    """
+    clauses = []
+    for col_name, operator, value in parse_filter_query(filter_query):
+        if col_name not in pitcher_stats.c:
+            continue
+        col = pitcher_stats.c[col_name]
+        numeric = isinstance(col.type, (Integer, Numeric))
+        if operator in ORDERED_OPERATORS:
+            if numeric and isinstance(value, float):
+                clauses.append(OPERATOR_FUNCTIONS[operator](col, value))
+        elif operator in ('eq', 'ne'):
+            if numeric != isinstance(value, float):
+                if operator == 'eq':
+                    clauses.append(false())
+            elif operator == 'ne':
+                # NULLs are unequal to everything, as NaN is in pandas
+                clauses.append(col.is_distinct_from(value))
+            else:
+                clauses.append(col == value)
+        elif operator == 'contains':
+            clauses.append(cast(col, String).icontains(str(value), autoescape=True))
+        elif operator == 'datestartswith':
+            clauses.append(cast(col, String).startswith(str(value), autoescape=True))
+    return clauses
+
+def averages_query(columns, teams=None, pitches_range=None, date_range=None):
+    """
+    SELECT of AVG(column) for each column over the pitchers matching the filters
+    """
+    return select(
+        *[func.avg(pitcher_stats.c[name]).label(name) for name in columns]
+    ).where(*pitcher_filters(teams, pitches_range, date_range))
+
+def fetch_pitchers(engine, columns=None, teams=None, pitches_range=None, date_range=None):
+    """
+    Fetch the filtered pitcher rows, restricted to the given columns
+
+    Returns:
+        DataFrame with one row per matching pitcher
+    """
+    query = pitcher_rows_query(columns, teams, pitches_range, date_range)
+    with db_query('fetch_pitchers') as record_rows, engine.connect() as conn:
+        df = pd.read_sql(query, conn)
+        record_rows(len(df))
+    return df
+
+def fetch_averages(engine, columns, teams=None, pitches_range=None, date_range=None):
+    """
+    Average each column over the filtered pitchers inside the database
+
+    Returns:
+        List of averages in the order of columns (NaN when no pitcher matches)
+    """
+    query = averages_query(columns, teams, pitches_range, date_range)
+    with db_query('fetch_averages') as record_rows, engine.connect() as conn:
+        row = conn.execute(query).one()
+        record_rows(1)
+    return [float('nan') if value is None else float(value) for value in row]
+
+def fetch_table_page(engine, columns, page_current, page_size, sort_by=None, filter_query=None,
+                     teams=None, pitches_range=None, date_range=None):
+    """
+    Filter, sort and page the pitcher table inside the database
+
+    The same contract as query_table: the DataTable's filter_query, sort_by
+    and page become WHERE, ORDER BY and LIMIT/OFFSET, so only the visible page
+    leaves the database. The page count comes from a COUNT(*) over the same
+    filters. Rows are ordered by player_id after the sort keys so pages are stable.
+
+    Returns:
+        Tuple of (records for the page, page count)
+    """
+    where = pitcher_filters(teams, pitches_range, date_range) + table_filter_clauses(filter_query)
+    count_query = select(func.count()).select_from(pitcher_stats).where(*where)
+    order_by = [
+        (pitcher_stats.c[s['column_id']].asc() if s['direction'] == 'asc'
+         else pitcher_stats.c[s['column_id']].desc()).nulls_last()
+        for s in (sort_by or []) if s['column_id'] in pitcher_stats.c
+    ] + [pitcher_stats.c.player_id]
+
+    with db_query('fetch_table_page') as record_rows, engine.connect() as conn:
+        total = conn.execute(count_query).scalar()
+        page_count = max(1, math.ceil(total / page_size))
+        page_current = min(page_current or 0, page_count - 1)
+        query = (pitcher_rows_query(columns).where(*where).order_by(*order_by)
+                 .limit(page_size).offset(page_current * page_size))
+        df = pd.read_sql(query, conn)
+        record_rows(len(df))
+    return df[columns].to_dict('records'), page_count
+
+def fetch_game_date_bounds(engine):
+    """
+    First and last game date in the database
+
+    Returns:
+        (first, last) dates, or None if there are no games
+    """
+    query = select(func.min(games.c.game_date), func.max(games.c.game_date))
+    with db_query('fetch_game_date_bounds') as record_rows, engine.connect() as conn:
+        first, last = conn.execute(query).one()
+        record_rows(1)
+    if first is None:
+        return None
+    return first, last
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+from plotly.io.json import to_json_plotly
+
+# Disk entries of one snapshot live in a directory named with this prefix, its version and its uid
+SNAPSHOT_DIR_PREFIX = 'snapshot-'
+SNAPSHOT_DIR_PATTERN = re.compile(rf'^{SNAPSHOT_DIR_PREFIX}v(?P<generation>\d+)-')
+
+class ResultCache:
+    """
+    Size-bounded LRU cache of callback results keyed by snapshot and filter state
+
+    Entries live in memory per worker and, when disk_dir is set, also as JSON
+    files in a directory shared by every worker on the host. Keys start with the
+    snapshot's uid. Snapshots are ordered by how far their version is from zero
+    (published versions count up, local ones down), and entries are kept for the
+    keep_snapshots newest ones, so a request still finishing on the previous
+    snapshot after a swap neither resets the cache nor loses its directory.
+    Only a newer snapshot drops older entries; results for snapshots older than
+    those kept are computed without being cached. Other workers may lag behind
+    by a version, so disk directories are only removed once their snapshot is
+    older than every kept one, as the shared snapshot directory does with its
+    versions.
+
+    Args:
+        max_entries: Maximum entries kept in memory
+        disk_dir: Optional directory for the shared on-disk backend
+        max_disk_entries: Maximum entries kept on disk per snapshot
+        keep_snapshots: Number of newest snapshots whose entries are kept
+    """
+    def __init__(self, max_entries=256, disk_dir=None, max_disk_entries=2048, keep_snapshots=3):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries
+        self.keep_snapshots = keep_snapshots
+        self._entries = OrderedDict()
+        self._newest = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get_or_compute(self, snapshot, key, compute):
+        """
+        Return the cached result for (snapshot, key), computing and storing it on a miss
+
+        Args:
+            snapshot: DataSnapshot the result is computed from
+            key: Hashable, JSON-serializable description of the filter state
+            compute: Zero-argument callable producing the result
+
+        Returns:
+            The cached or freshly computed result
+        """
+        generation = abs(snapshot.version)
+        if not self._check_snapshot(generation):
+            with self._lock:
+                self.misses += 1
+            return compute()
+        snapshot_dir = self._snapshot_dir(snapshot)
+        digest = hashlib.sha1(json.dumps([snapshot.uid, key], default=str).encode()).hexdigest()
+
+        with self._lock:
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return self._entries[digest][1]
+
+        value = self._read_disk(snapshot_dir, digest)
+        if value is None:
+            with self._lock:
+                self.misses += 1
+            value = compute()
+            self._write_disk(snapshot_dir, digest, value)
+        else:
+            with self._lock:
+                self.hits += 1
+
+        with self._lock:
+            self._entries[digest] = (generation, value)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def _check_snapshot(self, generation):
+        """
+        Move forward to a newer snapshot, dropping entries of those no longer kept
+
+        Returns:
+            False if the snapshot is older than every kept one and must not be cached
+        """
+        with self._lock:
+            if self._newest is not None and generation <= self._newest:
+                return generation > self._newest - self.keep_snapshots
+            self._newest = generation
+            oldest_kept = generation - self.keep_snapshots + 1
+            for digest in [d for d, (g, _) in self._entries.items() if g < oldest_kept]:
+                del self._entries[digest]
+        if self.disk_dir:
+            for entry in os.listdir(self.disk_dir):
+                match = SNAPSHOT_DIR_PATTERN.match(entry)
+                if match and int(match.group('generation')) < oldest_kept:
+                    shutil.rmtree(os.path.join(self.disk_dir, entry), ignore_errors=True)
+        return True
+
+    def _snapshot_dir(self, snapshot):
+        if not self.disk_dir:
+            return None
+        return os.path.join(self.disk_dir, f'{SNAPSHOT_DIR_PREFIX}v{abs(snapshot.version)}-{snapshot.uid}')
+
+    def _read_disk(self, snapshot_dir, digest):
+        if not snapshot_dir:
+            return None
+        path = os.path.join(snapshot_dir, f'{digest}.json')
+        try:
+            with open(path) as f:
+                value = json.load(f)
+            # Refresh mtime so disk eviction drops the least recently used entries
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            return None
+        return value
+
+    def _write_disk(self, snapshot_dir, digest, value):
+        if not snapshot_dir:
+            return
+        try:
+            os.makedirs(snapshot_dir, exist_ok=True)
+            fd, staging = tempfile.mkstemp(dir=snapshot_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                f.write(to_json_plotly(value))
+            os.replace(staging, os.path.join(snapshot_dir, f'{digest}.json'))
+        except FileNotFoundError:
+            # A worker further ahead removed this snapshot's directory; the result is still returned
+            return
+        self._evict_disk(snapshot_dir)
+
+    def _evict_disk(self, snapshot_dir):
+        try:
+            entries = [e for e in os.scandir(snapshot_dir) if e.name.endswith('.json')]
+        except FileNotFoundError:
+            return
+        if len(entries) <= self.max_disk_entries:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_disk_entries]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
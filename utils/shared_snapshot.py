@@ -0,0 +1,319 @@
+"""
+Share the processed pitcher table between gunicorn workers
+
+One worker (the leader, holding an flock on the snapshot directory) loads the
+data and publishes it as a directory of .npy column files, next to the arrays
+of the snapshot's filter index, summary cube and comparison index. Every
+worker, leader included, memory-maps those files read-only, so the table and
+its indexes live once in the page cache no matter how many workers attach to
+them. String columns are stored packed and read through PyArrow, so no worker
+creates a str object per value. Followers poll for new versions and take over
+leadership if the leader exits.
+"""
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from utils.comparison_index import ComparisonIndex
+from utils.filter_index import FilterIndex
+from utils.packed_strings import pack_strings, strings_array
+from utils.snapshot import DataSnapshot
+from utils.summary_cube import SummaryCube
+
+CURRENT_FILE = 'CURRENT'
+LOCK_FILE = '.leader.lock'
+META_FILE = 'meta.json'
+
+# Published versions kept on disk; older ones may still be mapped by slow readers
+KEEP_VERSIONS = 3
+
+def default_snapshot_dir():
+    """
+    Snapshot directory: SNAPSHOT_DIR, else a directory in /dev/shm when available
+    """
+    if os.environ.get('SNAPSHOT_DIR'):
+        return os.environ['SNAPSHOT_DIR']
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, 'baseball_dashboard')
+
+def write_columns(df, path):
+    """
+    Write a DataFrame as .npy files, returning the column list for the meta.json manifest
+
+    Numeric, boolean and datetime columns are stored as-is. String columns are
+    packed into offset, UTF-8 data and validity files. Categorical columns, and
+    any other column, are stored as codes with the categories in the manifest.
+    """
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        file_name = f'col_{i}.npy'
+        if not isinstance(series.dtype, pd.CategoricalDtype) and series.dtype.kind in 'biufcmM':
+            np.save(os.path.join(path, file_name), series.to_numpy())
+            columns.append({'name': name, 'file': file_name, 'kind': 'array'})
+            continue
+        packed = _pack_string_column(series)
+        if packed is not None:
+            files = {}
+            for part, values in zip(('offsets', 'data', 'validity'), packed):
+                if values is not None:
+                    files[part] = f'col_{i}_{part}.npy'
+                    np.save(os.path.join(path, files[part]), values)
+            columns.append({'name': name, 'kind': 'string', 'files': files})
+            continue
+        categorical = pd.Categorical(series)
+        np.save(os.path.join(path, file_name), categorical.codes)
+        columns.append({'name': name, 'file': file_name, 'kind': 'category',
+                        'categories': categorical.categories.tolist()})
+    return columns
+
+def _pack_string_column(series):
+    """
+    Packed buffers of a column holding only strings and missing values, else None
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return None
+    if not isinstance(series.dtype, pd.StringDtype):
+        if series.dtype != object or not series.dropna().map(type).eq(str).all():
+            return None
+    try:
+        return pack_strings(series.to_numpy(dtype=object))
+    except pa.ArrowCapacityError:
+        return None
+
+def write_arrays(arrays, path, prefix):
+    """
+    Save named arrays as .npy files, returning the name -> file map for the manifest
+    """
+    files = {}
+    for i, (name, values) in enumerate(arrays.items()):
+        files[name] = f'{prefix}_{i}.npy'
+        np.save(os.path.join(path, files[name]), values)
+    return files
+
+def read_arrays(path, files):
+    """
+    Memory-map the arrays written by write_arrays
+    """
+    return {name: np.load(os.path.join(path, file_name), mmap_mode='r') for name, file_name in files.items()}
+
+def read_columns(path, columns):
+    """
+    Memory-map the column files written by write_columns into a DataFrame without copying
+    """
+    data = {}
+    for column in columns:
+        if column['kind'] == 'string':
+            buffers = read_arrays(path, column['files'])
+            values = strings_array(buffers['offsets'], buffers['data'], buffers.get('validity'))
+        else:
+            values = np.load(os.path.join(path, column['file']), mmap_mode='r')
+        if column['kind'] == 'category':
+            values = pd.Categorical.from_codes(values, categories=column['categories'], validate=False)
+        data[column['name']] = pd.Series(values, copy=False)
+    return pd.DataFrame(data, copy=False)
+
+def write_structures(snapshot, path):
+    """
+    Save the snapshot's filter index, summary cube and comparison index, returning their manifest entries
+    """
+    structures = {}
+    for name in ('index', 'cube', 'comparison'):
+        meta, arrays = getattr(snapshot, name).to_arrays()
+        structures[name] = {'meta': meta, 'files': write_arrays(arrays, path, name)}
+    return structures
+
+def read_structures(df, path, structures):
+    """
+    Attach to the structures saved by write_structures
+
+    Returns:
+        Dict of DataSnapshot keyword arguments: index, cube and comparison
+    """
+    arrays = {name: read_arrays(path, entry['files']) for name, entry in structures.items()}
+    index = FilterIndex.from_arrays(structures['index']['meta'], arrays['index'])
+    return {
+        'index': index,
+        'cube': SummaryCube.from_arrays(df, index, structures['cube']['meta'], arrays['cube']),
+        'comparison': ComparisonIndex.from_arrays(df, structures['comparison']['meta'], arrays['comparison']),
+    }
+
+class SharedSnapshotDirectory:
+    """
+    Versioned, memory-mapped snapshots in a directory shared by all workers
+
+    Args:
+        base_dir: Directory on a filesystem every worker can see (ideally tmpfs)
+        data_source: Data source the snapshots are loaded from, e.g. 'database';
+            snapshots published under another data source are never attached
+    """
+    def __init__(self, base_dir=None, data_source=None):
+        self.base_dir = base_dir or default_snapshot_dir()
+        self.data_source = data_source
+        os.makedirs(self.base_dir, exist_ok=True)
+        self._lock_fd = None
+
+    @property
+    def is_leader(self):
+        return self._lock_fd is not None
+
+    def try_lead(self):
+        """
+        Try to become the worker that loads and publishes data
+
+        Returns:
+            True if this process is (now) the leader
+        """
+        if self._lock_fd is not None:
+            return True
+        fd = os.open(os.path.join(self.base_dir, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def current_version(self):
+        """
+        Version number of the latest published snapshot, or None if there is none
+        """
+        try:
+            with open(os.path.join(self.base_dir, CURRENT_FILE)) as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def publish(self, snapshot):
+        """
+        Write a snapshot as the next version and attach to it
+
+        The version directory is fully written before CURRENT is atomically
+        replaced, so readers never see a partial snapshot.
+
+        Returns:
+            DataSnapshot backed by the memory-mapped files
+        """
+        version = (self.current_version() or 0) + 1
+        staging = tempfile.mkdtemp(prefix=f'.v{version}-', dir=self.base_dir)
+        columns = write_columns(snapshot.df, staging)
+        structures = write_structures(snapshot, staging)
+        meta = {
+            'version': version,
+            'uid': snapshot.uid,
+            'data_source': self.data_source,
+            'source': snapshot.source,
+            'loaded_at': snapshot.loaded_at,
+            'fingerprint': snapshot.fingerprint,
+            'game_dates': snapshot.game_dates,
+            'rows': len(snapshot.df),
+            'columns': columns,
+            'structures': structures,
+        }
+        with open(os.path.join(staging, META_FILE), 'w') as f:
+            json.dump(meta, f)
+        os.chmod(staging, 0o755)
+        os.rename(staging, os.path.join(self.base_dir, f'v{version}'))
+
+        pointer = os.path.join(self.base_dir, f'.{CURRENT_FILE}.tmp')
+        with open(pointer, 'w') as f:
+            f.write(str(version))
+        os.replace(pointer, os.path.join(self.base_dir, CURRENT_FILE))
+
+        self._remove_old_versions(version)
+        return self.attach()
+
+    def attach(self):
+        """
+        Memory-map the latest published snapshot
+
+        Returns:
+            DataSnapshot, or None if nothing has been published yet or the
+            latest snapshot was published under another data source
+        """
+        version = self.current_version()
+        if version is None:
+            return None
+        path = os.path.join(self.base_dir, f'v{version}')
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        if meta.get('data_source') != self.data_source:
+            return None
+        df = read_columns(path, meta['columns'])
+        # Snapshots published before the structures were stored are indexed here instead
+        structures = read_structures(df, path, meta['structures']) if 'structures' in meta else {}
+        return DataSnapshot(df, meta['source'], version=meta['version'], loaded_at=meta['loaded_at'],
+                            fingerprint=meta.get('fingerprint'), uid=meta.get('uid'),
+                            game_dates=meta.get('game_dates'), **structures)
+
+    def _remove_old_versions(self, version):
+        for entry in os.listdir(self.base_dir):
+            if entry.startswith('v') and entry[1:].isdigit() and int(entry[1:]) <= version - KEEP_VERSIONS:
+                # Workers that still map the files keep them alive until they re-attach
+                shutil.rmtree(os.path.join(self.base_dir, entry), ignore_errors=True)
+
+class SnapshotFollower:
+    """
+    Background thread that attaches followers to newly published snapshots
+
+    Args:
+        store: SnapshotStore to publish attached snapshots to
+        shared: SharedSnapshotDirectory to watch
+        interval: Seconds between checks for a new version
+        on_leadership: Called once if this worker takes over as leader
+    """
+    def __init__(self, store, shared, interval, on_leadership=None):
+        self.store = store
+        self.shared = shared
+        self.interval = interval
+        self.on_leadership = on_leadership
+        self._skipped_version = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='snapshot-follower', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def poll(self):
+        """
+        Attach to the latest version if it is newer than the current snapshot
+
+        Returns:
+            True if a new snapshot was attached
+        """
+        version = self.shared.current_version()
+        current = self.store.current()
+        if version is None or version == self._skipped_version:
+            return False
+        if current is not None and current.version == version:
+            return False
+        try:
+            snapshot = self.shared.attach()
+        except (OSError, ValueError) as e:
+            print(f"Failed to attach shared snapshot v{version}: {e}")
+            return False
+        if snapshot is None:
+            print(f"Shared snapshot v{version} was published under another data source, ignoring it")
+            self._skipped_version = version
+            return False
+        self.store.swap(snapshot)
+        print(f"Attached shared data snapshot v{snapshot.version} ({len(snapshot.df)} records)")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+            if self.shared.try_lead():
+                print("Leader worker exited, taking over data refreshes")
+                if self.on_leadership:
+                    self.on_leadership()
+                return
@@ -0,0 +1,193 @@
+import itertools
+import threading
+import time
+import uuid
+
+from utils.filter_index import FilterIndex
+from utils.summary_cube import SummaryCube
+from utils.comparison_index import ComparisonIndex
+
+# Shared directories publish versions 1, 2, ...; snapshots made in this process
+# count down instead, so a local snapshot never passes for a published one
+_versions = itertools.count(-1, -1)
+
+class DataSnapshot:
+    """
+    Immutable view of the processed pitcher table
+
+    The DataFrame must not be modified once it is wrapped in a snapshot;
+    callbacks filter into new frames instead. The filter index, summary cube
+    and comparison index are built here, off the request path, alongside the
+    data they cover, unless prebuilt ones are passed in, as when attaching to
+    a shared snapshot. fingerprint identifies the state of the source the data
+    was loaded from (None when unknown), so unchanged data is not reloaded.
+    game_dates is the first and last game date in the source as ISO strings,
+    looked up when the data is loaded, or None when the date filter is
+    unavailable.
+    Published snapshots take the shared directory's positive version and local
+    ones a negative version, but versions from different processes or
+    directories can still repeat; uid is unique to one snapshot and is what
+    results computed from it are cached under.
+    """
+    __slots__ = ('df', 'version', 'uid', 'source', 'loaded_at', 'fingerprint', 'game_dates',
+                 'index', 'cube', 'comparison')
+
+    def __init__(self, df, source, version=None, loaded_at=None, fingerprint=None, uid=None, game_dates=None,
+                 index=None, cube=None, comparison=None):
+        object.__setattr__(self, 'df', df)
+        object.__setattr__(self, 'version', version if version is not None else next(_versions))
+        object.__setattr__(self, 'uid', uid or uuid.uuid4().hex)
+        object.__setattr__(self, 'source', source)
+        object.__setattr__(self, 'loaded_at', loaded_at if loaded_at is not None else time.time())
+        object.__setattr__(self, 'fingerprint', fingerprint)
+        object.__setattr__(self, 'game_dates', list(game_dates) if game_dates else None)
+        object.__setattr__(self, 'index', index if index is not None else FilterIndex(df))
+        object.__setattr__(self, 'cube', cube if cube is not None else SummaryCube(df, self.index))
+        object.__setattr__(self, 'comparison',
+                           comparison if comparison is not None else ComparisonIndex(df, self.index))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DataSnapshot is immutable")
+
+    @property
+    def age(self):
+        """Seconds since the snapshot was loaded"""
+        return time.time() - self.loaded_at
+
+class SnapshotStore:
+    """
+    Holds the current snapshot and swaps in new ones atomically
+
+    Readers call current() once per request and keep using that snapshot,
+    so a swap never exposes a half-built frame.
+    """
+    def __init__(self, snapshot=None):
+        self._snapshot = snapshot
+        self._lock = threading.Lock()
+
+    def current(self):
+        return self._snapshot
+
+    def swap(self, snapshot):
+        """
+        Publish a new snapshot, returning the one it replaced
+        """
+        with self._lock:
+            previous, self._snapshot = self._snapshot, snapshot
+        return previous
+
+class SnapshotRefresher:
+    """
+    Background thread that reloads data off the request path
+
+    Args:
+        store: SnapshotStore to publish new snapshots to
+        loader: Callable returning a processed DataFrame, raising on failure
+        interval: Seconds between scheduled refreshes after the initial load
+        source: Label recorded on snapshots built by this refresher
+        publish: Optional callable turning a new snapshot into the one to store,
+            e.g. SharedSnapshotDirectory.publish
+        fingerprint: Optional callable returning a cheap JSON-serializable summary
+            of the source's state, or None when it cannot tell; the load is skipped
+            while it matches the current snapshot's
+        cache: Optional SnapshotCache every newly loaded snapshot is saved to
+        game_dates: Optional callable returning the source's first and last game
+            date as ISO strings, or None when there are none; stored on each
+            new snapshot so requests never look them up
+    """
+    def __init__(self, store, loader, interval, source='database', publish=None, fingerprint=None, cache=None,
+                 game_dates=None):
+        self.store = store
+        self.loader = loader
+        self.interval = interval
+        self.source = source
+        self.publish = publish
+        self.fingerprint = fingerprint
+        self.cache = cache
+        self.game_dates = game_dates
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='snapshot-refresher', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def trigger(self):
+        """
+        Request an immediate refresh instead of waiting for the schedule
+        """
+        self._wake.set()
+
+    def refresh(self):
+        """
+        Load and publish a new snapshot; on failure the current one is kept
+
+        When the source fingerprint matches the current snapshot's, nothing is
+        reloaded. A snapshot restored from a cache is then published as loaded
+        from the source, since it holds the same data, and so is a snapshot whose
+        game dates were unavailable and can now be looked up.
+
+        Returns:
+            True if a new snapshot was published
+        """
+        try:
+            started = time.perf_counter()
+            fingerprint = self.source_fingerprint()
+            current = self.store.current()
+            unchanged = fingerprint is not None and current is not None and current.fingerprint == fingerprint
+            if unchanged:
+                game_dates = current.game_dates or self.source_game_dates()
+                if current.source == self.source and game_dates == current.game_dates:
+                    print(f"Source unchanged since data snapshot v{current.version}, skipping reload")
+                    return False
+                df = current.df
+            else:
+                df = self.loader()
+                game_dates = self.source_game_dates()
+            snapshot = DataSnapshot(df, self.source, fingerprint=fingerprint, game_dates=game_dates)
+            if self.publish:
+                snapshot = self.publish(snapshot)
+        except Exception as e:
+            print(f"Data refresh failed, keeping current snapshot: {e}")
+            return False
+        self.store.swap(snapshot)
+        print(f"Published data snapshot v{snapshot.version} ({len(snapshot.df)} records, "
+              f"{time.perf_counter() - started:.2f}s{', confirmed cached data' if unchanged else ''})")
+        if self.cache is not None and not unchanged:
+            try:
+                self.cache.save(snapshot)
+            except Exception as e:
+                print(f"Failed to save snapshot cache: {e}")
+        return True
+
+    def source_fingerprint(self):
+        """
+        Current source fingerprint, or None when there is no fingerprint function or it fails
+        """
+        if self.fingerprint is None:
+            return None
+        try:
+            return self.fingerprint()
+        except Exception as e:
+            print(f"Source fingerprint unavailable, reloading: {e}")
+            return None
+
+    def source_game_dates(self):
+        """
+        First and last game date in the source, or None when there is no lookup or it fails
+        """
+        if self.game_dates is None:
+            return None
+        try:
+            return self.game_dates()
+        except Exception as e:
+            print(f"Game dates unavailable, date filter disabled: {e}")
+            return None
+
+    def _run(self):
+        # Load once straight away, then on the schedule (interval <= 0 loads only once)
+        self.refresh()
+        while self.interval > 0:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.refresh()
@@ -0,0 +1,132 @@
+"""
+Persist the processed pitcher table as versioned Parquet snapshots on disk
+
+After every successful load the processed DataFrame is written to
+v<N>.parquet, then manifest.json is atomically replaced to point at it. The
+manifest records the source the data came from and the source fingerprint it
+was loaded at. A restarting server reads the newest snapshot back in
+milliseconds instead of re-querying and re-processing the table, re-queries
+only if the fingerprint has changed, and keeps serving the last known data
+when the database cannot be reached.
+"""
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+from utils.snapshot import DataSnapshot
+
+MANIFEST_FILE = 'manifest.json'
+
+# Bump when process_pitcher_data changes the columns or dtypes it produces, so older caches are ignored
+CACHE_FORMAT = 1
+
+# Snapshot files kept on disk; the previous one may still be being read by another process
+KEEP_VERSIONS = 2
+
+def default_cache_dir():
+    """
+    Cache directory: SNAPSHOT_CACHE_DIR, else data/snapshot_cache in the project
+    """
+    if os.environ.get('SNAPSHOT_CACHE_DIR'):
+        return os.environ['SNAPSHOT_CACHE_DIR']
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'snapshot_cache')
+
+class SnapshotCache:
+    """
+    Versioned Parquet snapshots of the processed table with a JSON manifest
+
+    Args:
+        base_dir: Directory on persistent storage (unlike the tmpfs shared snapshots)
+    """
+    def __init__(self, base_dir=None):
+        self.base_dir = base_dir or default_cache_dir()
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def manifest(self):
+        """
+        Manifest of the latest saved snapshot, or None if there is no usable one
+        """
+        try:
+            with open(os.path.join(self.base_dir, MANIFEST_FILE)) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if manifest.get('format') != CACHE_FORMAT:
+            return None
+        return manifest
+
+    def save(self, snapshot):
+        """
+        Write a snapshot as the next version and point the manifest at it
+
+        The Parquet file is fully written before the manifest is atomically
+        replaced, so readers never see a partial snapshot.
+
+        Returns:
+            The new manifest
+        """
+        previous = self.manifest()
+        version = (previous['version'] if previous else 0) + 1
+        file_name = f'v{version}.parquet'
+
+        fd, staging = tempfile.mkstemp(prefix=f'.{file_name}-', dir=self.base_dir)
+        os.close(fd)
+        try:
+            # Parquet keeps the float32, small integer and categorical dtypes through pandas metadata
+            snapshot.df.to_parquet(staging, engine='pyarrow', index=False)
+            os.replace(staging, os.path.join(self.base_dir, file_name))
+        except BaseException:
+            os.unlink(staging)
+            raise
+
+        manifest = {
+            'format': CACHE_FORMAT,
+            'version': version,
+            'file': file_name,
+            'source': snapshot.source,
+            'loaded_at': snapshot.loaded_at,
+            'fingerprint': snapshot.fingerprint,
+            'game_dates': snapshot.game_dates,
+            'rows': len(snapshot.df),
+        }
+        fd, pointer = tempfile.mkstemp(prefix=f'.{MANIFEST_FILE}-', dir=self.base_dir)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(pointer, os.path.join(self.base_dir, MANIFEST_FILE))
+
+        self._remove_old_versions(version)
+        return manifest
+
+    def load(self, source):
+        """
+        Read the latest snapshot saved from the given source
+
+        Args:
+            source: Source label the snapshot must have been loaded from, e.g. 'database'
+
+        Returns:
+            DataSnapshot labelled 'cache' that keeps the saved load time and
+            fingerprint, or None if there is no matching snapshot
+        """
+        manifest = self.manifest()
+        if manifest is None or manifest['source'] != source:
+            return None
+        try:
+            df = pd.read_parquet(os.path.join(self.base_dir, manifest['file']), engine='pyarrow')
+        except (OSError, ValueError) as e:
+            print(f"Failed to read cached snapshot v{manifest['version']}: {e}")
+            return None
+        return DataSnapshot(df, 'cache', loaded_at=manifest['loaded_at'], fingerprint=manifest['fingerprint'],
+                            game_dates=manifest.get('game_dates'))
+
+    def _remove_old_versions(self, version):
+        for entry in os.listdir(self.base_dir):
+            stem = entry[1:-len('.parquet')]
+            if entry.startswith('v') and entry.endswith('.parquet') and stem.isdigit() \
+                    and int(stem) <= version - KEEP_VERSIONS:
+                try:
+                    os.unlink(os.path.join(self.base_dir, entry))
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,159 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from utils.derived_stats import BATTING_COLUMNS, PITCH_COLUMNS
+
+# Columns the summary charts average, and the width of a pitch-count bucket (the slider step)
+CUBE_COLUMNS = PITCH_COLUMNS + BATTING_COLUMNS
+PITCHES_BUCKET = 5
+
+class SummaryCube:
+    """
+    Sums and non-missing counts of CUBE_COLUMNS per (team, pitch-count bucket)
+
+    Buckets start at the snapshot's minimum pitch count and are PITCHES_BUCKET
+    wide, so every range the pitch slider can produce covers whole buckets and a
+    filtered mean is a sum over a few cells. Range ends that cut through a
+    bucket are answered exactly by scanning only the rows of that partial bucket.
+
+    Args:
+        df: DataFrame of the snapshot
+        index: FilterIndex of the snapshot, used for partial-bucket scans
+        columns: Columns to aggregate
+        bucket_size: Width of a pitch-count bucket
+    """
+    def __init__(self, df, index, columns=CUBE_COLUMNS, bucket_size=PITCHES_BUCKET):
+        self.index = index
+        self.columns = [col for col in columns if col in df.columns]
+        self.bucket_size = bucket_size
+        self.values = {col: df[col].to_numpy() for col in self.columns}
+        self.enabled = 'team' in df.columns and 'pitches' in df.columns and len(df) > 0
+        if not self.enabled:
+            return
+
+        pitches = df['pitches'].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(pitches)
+        # Bucket edges only line up with slider values for whole pitch counts
+        if not valid.any() or np.any(pitches[valid] % 1):
+            self.enabled = False
+            return
+
+        codes, uniques = pd.factorize(df['team'])
+        # Rows without a team get their own slot so the all-teams total still counts them
+        codes = np.where(codes < 0, len(uniques), codes)[valid]
+        self.teams = {value: i for i, value in enumerate(uniques)}
+        n_teams = len(uniques) + 1
+
+        self.base = pitches[valid].min()
+        buckets = ((pitches[valid] - self.base) // bucket_size).astype(np.intp)
+        self.n_buckets = int(buckets.max()) + 1
+        cells = codes * self.n_buckets + buckets
+        size = n_teams * self.n_buckets
+
+        shape = (n_teams, self.n_buckets, len(self.columns))
+        self.sums = np.zeros(shape)
+        self.counts = np.zeros(shape, dtype=np.int64)
+        for j, col in enumerate(self.columns):
+            values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)[valid]
+            present = ~np.isnan(values)
+            self.sums[:, :, j] = np.bincount(cells[present], weights=values[present], minlength=size).reshape(n_teams, self.n_buckets)
+            self.counts[:, :, j] = np.bincount(cells[present], minlength=size).reshape(n_teams, self.n_buckets)
+
+    def to_arrays(self):
+        """
+        The cube as a JSON-serializable description plus its sum and count arrays
+
+        Returns:
+            Tuple of (meta, arrays) for from_arrays
+        """
+        meta = {'columns': self.columns, 'bucket_size': self.bucket_size, 'enabled': self.enabled}
+        if not self.enabled:
+            return meta, {}
+        teams = [team.item() if isinstance(team, np.generic) else team for team in self.teams]
+        meta.update(teams=teams, base=float(self.base), n_buckets=self.n_buckets)
+        return meta, {'sums': self.sums, 'counts': self.counts}
+
+    @classmethod
+    def from_arrays(cls, df, index, meta, arrays):
+        """
+        Rebuild a cube from to_arrays output without re-aggregating the frame
+
+        Args:
+            df: DataFrame the cube was built from, read by partial-bucket scans
+            index: FilterIndex of that DataFrame
+            meta, arrays: Output of to_arrays
+        """
+        cube = cls.__new__(cls)
+        cube.index = index
+        cube.columns = meta['columns']
+        cube.bucket_size = meta['bucket_size']
+        cube.values = {col: df[col].to_numpy() for col in cube.columns}
+        cube.enabled = meta['enabled']
+        if cube.enabled:
+            cube.teams = {team: i for i, team in enumerate(meta['teams'])}
+            cube.base = meta['base']
+            cube.n_buckets = meta['n_buckets']
+            cube.sums = arrays['sums']
+            cube.counts = arrays['counts']
+        return cube
+
+    def covers(self, columns):
+        return self.enabled and all(col in self.values for col in columns)
+
+    def means(self, columns, teams=None, pitches_range=None):
+        """
+        Mean of each column over the rows matching the filters, skipping missing values
+
+        Args:
+            columns: Columns to average, all in self.columns
+            teams: Team names to include; empty or None means all teams
+            pitches_range: (low, high) inclusive pitch-count range
+
+        Returns:
+            List of means in the order of columns (NaN where no value matches)
+        """
+        cols = [self.columns.index(col) for col in columns]
+        low, high = pitches_range if pitches_range is not None else (None, None)
+        # Pitch counts are whole numbers, so the range is [lo, hi] over integers
+        lo = self.base if low is None else max(math.ceil(low), self.base)
+        hi = self.base + self.n_buckets * self.bucket_size - 1 if high is None else math.floor(high)
+
+        if teams:
+            team_rows = [self.teams[team] for team in teams if team in self.teams]
+        else:
+            team_rows = slice(None)
+
+        sums = np.zeros(len(cols))
+        counts = np.zeros(len(cols), dtype=np.int64)
+        if lo > hi:
+            return [math.nan] * len(cols)
+
+        # Whole buckets inside [lo, hi] come from the cube
+        first = math.ceil((lo - self.base) / self.bucket_size)
+        last = math.floor((hi - self.base + 1) / self.bucket_size) - 1
+        last = min(last, self.n_buckets - 1)
+        if first <= last:
+            sums += self.sums[team_rows, first:last + 1][..., cols].sum(axis=(0, 1))
+            counts += self.counts[team_rows, first:last + 1][..., cols].sum(axis=(0, 1))
+            partial = [(lo, self.base + first * self.bucket_size - 1),
+                       (self.base + (last + 1) * self.bucket_size, hi)]
+        else:
+            partial = [(lo, hi)]
+
+        # The cut-through buckets at either end are scanned row by row
+        for part_low, part_high in partial:
+            if part_low > part_high:
+                continue
+            positions = self.index.select(isin={'team': teams}, ranges={'pitches': (part_low, part_high)})
+            if len(positions) == 0:
+                continue
+            for k, col in enumerate(columns):
+                values = self.values[col][positions].astype(np.float64)
+                present = ~np.isnan(values)
+                sums[k] += values[present].sum()
+                counts[k] += present.sum()
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (sums / counts).tolist()
@@ -0,0 +1,150 @@
+import math
+import re
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from utils.data_processing import decimal_values
+
+# DataTable filter operators; the symbols are interchangeable with the words
+OPERATOR_SYMBOLS = {'>=': 'ge', '<=': 'le', '<': 'lt', '>': 'gt', '!=': 'ne', '=': 'eq'}
+# Operators that compare by order, which only applies to numeric columns
+ORDERED_OPERATORS = ('lt', 'le', 'gt', 'ge')
+# Operators that match text, whose values stay text even when they look like numbers
+TEXT_OPERATORS = ('contains', 'datestartswith')
+
+# One '{column} operator value' clause. Word operators must be followed by
+# whitespace, so the operator is never read out of the middle of a value.
+FILTER_CLAUSE = re.compile(
+    r"^\s*\{(?P<name>[^{}]+)\}\s*"
+    r"(?P<operator>>=|<=|!=|<|>|=|(?:ge|le|lt|gt|ne|eq|contains|datestartswith)(?=\s|$))"
+    r"\s*(?P<value>.*?)\s*$"
+)
+
+def split_filter_part(filter_part):
+    """
+    Parse one clause of a DataTable filter_query, e.g. '{pitches} >= 60'
+
+    Returns:
+        Tuple of (column, operator, value), or (None, None, None) if unparseable
+    """
+    match = FILTER_CLAUSE.match(filter_part)
+    if match is None:
+        return None, None, None
+    operator = OPERATOR_SYMBOLS.get(match.group('operator'), match.group('operator'))
+    value_part = match.group('value')
+    if len(value_part) > 1 and value_part[0] == value_part[-1] and value_part[0] in ("'", '"', '`'):
+        value = value_part[1:-1].replace('\\' + value_part[0], value_part[0])
+    elif operator in TEXT_OPERATORS:
+        value = value_part
+    else:
+        try:
+            value = float(value_part)
+        except ValueError:
+            value = value_part
+    return match.group('name'), operator, value
+
+def parse_filter_query(filter_query):
+    """
+    Split a DataTable filter_query into its parsed clauses, skipping unparseable ones
+
+    Returns:
+        List of (column, operator, value) tuples
+    """
+    if not filter_query:
+        return []
+    clauses = [split_filter_part(filter_part) for filter_part in filter_query.split(' && ')]
+    return [clause for clause in clauses if clause[0] is not None]
+
+def filter_mask(df, filter_query):
+    """
+    Evaluate a DataTable filter_query against a DataFrame
+
+    Clauses on unknown columns, and ordered comparisons on non-numeric
+    columns or with non-numeric values, are ignored.
+
+    Returns:
+        Boolean NumPy array, or None when the query is empty
+    """
+    if not filter_query:
+        return None
+    mask = np.ones(len(df), dtype=bool)
+    for col_name, operator, value in parse_filter_query(filter_query):
+        if col_name not in df.columns:
+            continue
+        column = df[col_name]
+        if operator in ORDERED_OPERATORS:
+            if not is_numeric_dtype(column) or not isinstance(value, float):
+                continue
+            mask &= getattr(column, operator)(value).to_numpy()
+        elif operator in ('eq', 'ne'):
+            # Missing strings compare as NA; like None in an object column, they are only != a value
+            mask &= getattr(column, operator)(value).to_numpy(dtype=bool, na_value=operator == 'ne')
+        elif operator == 'contains':
+            mask &= _as_text(column).str.contains(str(value), case=False, regex=False).to_numpy(
+                dtype=bool, na_value=False)
+        elif operator == 'datestartswith':
+            mask &= _as_text(column).str.startswith(str(value)).to_numpy(dtype=bool, na_value=False)
+    return mask
+
+def _as_text(column):
+    # String columns are searched as they are instead of being copied into Python str objects
+    return column if isinstance(column.dtype, pd.StringDtype) else column.astype(str)
+
+def query_table(df, columns, page_current, page_size, sort_by=None, filter_query=None):
+    """
+    Filter, sort and page a DataFrame, serializing only the requested page
+
+    Args:
+        df: DataFrame holding the table rows
+        columns: Columns included in the returned records
+        page_current: Zero-based page number
+        page_size: Rows per page
+        sort_by: DataTable sort_by list of {'column_id', 'direction'}
+        filter_query: DataTable filter_query string
+
+    Returns:
+        Tuple of (records for the page, page count)
+    """
+    mask = filter_mask(df, filter_query)
+    if mask is not None:
+        df = df.iloc[np.flatnonzero(mask)]
+
+    page_count = max(1, math.ceil(len(df) / page_size))
+    page_current = min(page_current or 0, page_count - 1)
+    start = page_current * page_size
+
+    sort_by = [s for s in (sort_by or []) if s['column_id'] in df.columns]
+    if sort_by:
+        # Sort only the key columns to find the rows on this page
+        keys = pd.DataFrame(
+            {s['column_id']: df[s['column_id']].to_numpy() for s in sort_by}
+        )
+        order = keys.sort_values(
+            [s['column_id'] for s in sort_by],
+            ascending=[s['direction'] == 'asc' for s in sort_by],
+            kind='mergesort'
+        ).index.to_numpy()
+        page = df.iloc[order[start:start + page_size]]
+    else:
+        page = df.iloc[start:start + page_size]
+
+    return page_records(page, columns), page_count
+
+def page_records(page, columns):
+    """
+    Rows of a page as records, with missing strings as None so they serialize to JSON
+    and float32 values at their source scale
+    """
+    page = page[columns]
+    rounded = {col: decimal_values(page[col], col) for col in columns if page[col].dtype == np.float32}
+    if rounded:
+        page = page.assign(**rounded)
+    records = page.to_dict('records')
+    for col in columns:
+        if isinstance(page[col].dtype, pd.StringDtype) and page[col].hasnans:
+            for record, missing in zip(records, page[col].isna().to_numpy()):
+                if missing:
+                    record[col] = None
+    return records